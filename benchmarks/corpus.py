@@ -0,0 +1,118 @@
+"""Generate synthetic Revit shared parameter files for benchmarks.
+
+Usage:
+    python benchmarks/corpus.py <out_file> [--params <count>]
+        [--groups <count>] [--dupl-rate <rate>] [--encoding <encod>]
+        [--seed <seed>]
+"""
+
+import argparse
+import io
+import random
+import uuid
+
+
+DISCIPLINES = ['Architecture', 'Structure', 'Mechanical', 'Electrical',
+               'Plumbing', 'Fire Protection', 'Civil', 'Interiors']
+
+SUBJECTS = ['Fire', 'Door', 'Window', 'Wall', 'Room', 'Duct', 'Pipe',
+            'Panel', 'Beam', 'Column', 'Slab', 'Fixture', 'Equipment',
+            'Zone', 'Level', 'Finish', 'Ceiling', 'Roof', 'Stair', 'Rail']
+
+QUALIFIERS = ['Rating', 'Width', 'Height', 'Depth', 'Area', 'Volume',
+              'Flow', 'Load', 'Voltage', 'Pressure', 'Code', 'Type',
+              'Mark', 'Status', 'Material', 'Cost', 'Weight', 'Angle']
+
+# datatype, datacategory
+DATATYPES = [('TEXT', ''), ('TEXT', ''), ('TEXT', ''), ('INTEGER', ''),
+             ('NUMBER', ''), ('LENGTH', ''), ('LENGTH', ''), ('AREA', ''),
+             ('VOLUME', ''), ('ANGLE', ''), ('YESNO', ''), ('URL', ''),
+             ('MATERIAL', ''), ('CURRENCY', ''), ('HVAC_AIR_FLOW', ''),
+             ('ELECTRICAL_POTENTIAL', ''), ('FAMILYTYPE', '-2000023')]
+
+HEADER = (
+    '# This is a Revit shared parameter file.\r\n'
+    '# Do not edit manually.\r\n'
+    '*META\tVERSION\tMINVERSION\r\n'
+    'META\t2\t1\r\n'
+    '*GROUP\tID\tNAME\r\n'
+    )
+
+PARAM_HEADER = ('*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\t'
+                'VISIBLE\tDESCRIPTION\tUSERMODIFIABLE\r\n')
+
+
+def _guid(rand):
+    return str(uuid.UUID(int=rand.getrandbits(128), version=4))
+
+
+def generate_rows(params=1000, groups=None, dupl_rate=0.0, seed=0):
+    """Return group and param rows of a synthetic shared param file.
+
+    groups defaults to one group per 50 params. dupl_rate is the fraction
+    of params that repeat the guid of an earlier param with another name.
+    """
+    rand = random.Random(seed)
+    groups = groups or max(1, params // 50)
+
+    grouprows = []
+    for idx in range(groups):
+        grouprows.append([str(idx + 1), '{} {}'.format(
+            DISCIPLINES[idx % len(DISCIPLINES)], idx // len(DISCIPLINES) + 1
+            )])
+
+    paramrows = []
+    for idx in range(params):
+        datatype, datacategory = rand.choice(DATATYPES)
+        name = '{} {} {}'.format(rand.choice(SUBJECTS),
+                                 rand.choice(QUALIFIERS), idx)
+        guid = _guid(rand)
+        if paramrows and rand.random() < dupl_rate:
+            guid = rand.choice(paramrows)[0]
+        desc = '' if rand.random() < 0.5 else \
+            'Synthetic {} parameter'.format(name.lower())
+        paramrows.append([guid, name, datatype, datacategory,
+                          str(rand.randint(1, groups)),
+                          '1' if rand.random() < 0.95 else '0',
+                          desc,
+                          '1' if rand.random() < 0.9 else '0'])
+
+    return grouprows, paramrows
+
+
+def write_rows(out_file, grouprows, paramrows, encoding='utf-8'):
+    """Write group and param rows as a shared param file."""
+    with io.open(out_file, 'w', encoding=encoding, newline='') as spf:
+        spf.write(HEADER)
+        spf.write(''.join('GROUP\t{}\r\n'.format('\t'.join(x))
+                          for x in grouprows))
+        spf.write(PARAM_HEADER)
+        spf.write(''.join('PARAM\t{}\r\n'.format('\t'.join(x))
+                          for x in paramrows))
+
+
+def generate(out_file, params=1000, groups=None, dupl_rate=0.0,
+             encoding='utf-8', seed=0):
+    """Write a synthetic shared param file with given number of params."""
+    grouprows, paramrows = generate_rows(params=params, groups=groups,
+                                         dupl_rate=dupl_rate, seed=seed)
+    write_rows(out_file, grouprows, paramrows, encoding=encoding)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out_file')
+    parser.add_argument('--params', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=None)
+    parser.add_argument('--dupl-rate', type=float, default=0.0)
+    parser.add_argument('--encoding', default='utf-8',
+                        help='e.g. utf-8 or utf-16')
+    parser.add_argument('--seed', type=int, default=0)
+    opts = parser.parse_args()
+    generate(opts.out_file, params=opts.params, groups=opts.groups,
+             dupl_rate=opts.dupl_rate, encoding=opts.encoding,
+             seed=opts.seed)
+
+
+if __name__ == '__main__':
+    main()
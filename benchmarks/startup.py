@@ -0,0 +1,105 @@
+"""Benchmark rsparam command line startup time.
+
+Runs each command in a fresh interpreter and reports the mean wall time,
+the optional presentation modules the command imported, and the import
+time saved by not loading the others at startup.
+
+Usage:
+    python benchmarks/startup.py [<src_file>] [--repeat <count>]
+"""
+
+import os
+import os.path as op
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = op.dirname(op.dirname(op.abspath(__file__)))
+
+# modules the cli used to import before parsing arguments
+LAZY_MODULES = ('docopt', 'colorful', 'tabulate')
+
+RUN_COMMAND = '''
+import sys
+sys.argv = ['rsparam'] + {argv!r}
+try:
+    from rsparam import cli
+    cli.main()
+except SystemExit:
+    pass
+finally:
+    sys.stderr.write(','.join(x for x in {modules!r} if x in sys.modules))
+'''
+
+SAMPLE_FILE = (
+    '# This is a Revit shared parameter file.\r\n'
+    '*META\tVERSION\tMINVERSION\r\n'
+    'META\t2\t1\r\n'
+    '*GROUP\tID\tNAME\r\n'
+    'GROUP\t1\tIdentity Data\r\n'
+    '*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\tVISIBLE\t'
+    'DESCRIPTION\tUSERMODIFIABLE\r\n'
+    'PARAM\t8a3b5c5e-4f7a-4b0e-9d1f-2c6e7a9b0d11\tMark\tTEXT\t\t1\t1\t\t1\r\n'
+    )
+
+
+def run(code, repeat):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', code], env=env,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / repeat, proc.stderr.decode().strip()
+
+
+def main():
+    argv = sys.argv[1:]
+    repeat = 10
+    if '--repeat' in argv:
+        idx = argv.index('--repeat')
+        repeat = int(argv[idx + 1])
+        del argv[idx:idx + 2]
+
+    if argv:
+        src_file = argv[0]
+    else:
+        src_file = op.join(tempfile.mkdtemp(), 'sample.txt')
+        with open(src_file, 'w', newline='') as sf:
+            sf.write(SAMPLE_FILE)
+    out_file = op.join(tempfile.mkdtemp(), 'out.txt')
+
+    commands = [
+        ['-V'],
+        ['-W'],
+        ['-q', 'list', '-p', '-o', out_file, src_file],
+        ['-q', 'find', 'Mark', '-o', out_file, src_file],
+        ['list', '-p', src_file],
+        ['find', 'dupl', '-a', src_file],
+        ]
+
+    # cost of each lazy module when imported up front
+    import_costs = {}
+    baseline, _ = run('pass', repeat)
+    for module in LAZY_MODULES:
+        timing, _ = run('import {}'.format(module), repeat)
+        import_costs[module] = max(timing - baseline, 0)
+
+    print('{:<48} {:>10} {:>10}  {}'.format('command', 'mean ms',
+                                            'saved ms', 'imported'))
+    for command in commands:
+        code = RUN_COMMAND.format(argv=command, modules=LAZY_MODULES)
+        timing, imported = run(code, repeat)
+        imported = [x for x in imported.split(',') if x]
+        saved = sum(v for k, v in import_costs.items() if k not in imported)
+        print('{:<48} {:>10.1f} {:>10.1f}  {}'.format(
+            ' '.join(op.basename(x) for x in command)[:48],
+            timing * 1000, saved * 1000, ', '.join(imported) or '-'))
+
+
+if __name__ == '__main__':
+    main()
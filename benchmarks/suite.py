@@ -0,0 +1,138 @@
+"""Benchmark rsparam public functions on synthetic shared param files.
+
+Times read_entries, write_entries, find, find_duplicates, compare, merge
+and subtract for each corpus size and writes the results as JSON.
+
+Usage:
+    python benchmarks/suite.py [--sizes 1000,10000,100000,1000000]
+        [--repeat <count>] [--encoding <encod>] [--output <json_file>]
+"""
+
+import argparse
+import json
+import os.path as op
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+import rsparam  # noqa
+import corpus  # noqa
+
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def make_second(grouprows, paramrows, seed=1, change_rate=0.01):
+    """Return a copy of rows with a fraction of params changed, removed
+    and added, for comparing, merging and subtracting."""
+    rand = random.Random(seed)
+    newgroups, newparams = corpus.generate_rows(
+        params=max(1, int(len(paramrows) * change_rate)),
+        groups=len(grouprows), seed=seed)
+    secondrows = []
+    for row in paramrows:
+        roll = rand.random()
+        if roll < change_rate:
+            continue
+        elif roll < change_rate * 2:
+            row = row[:6] + ['Changed description'] + row[7:]
+        secondrows.append(row)
+    return grouprows, secondrows + newparams
+
+
+def timeit(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_size(work_dir, size, repeat, encoding):
+    first_file = op.join(work_dir, 'first_{}.txt'.format(size))
+    second_file = op.join(work_dir, 'second_{}.txt'.format(size))
+    out_file = op.join(work_dir, 'out_{}.txt'.format(size))
+
+    grouprows, paramrows = corpus.generate_rows(params=size,
+                                                dupl_rate=0.01)
+    corpus.write_rows(first_file, grouprows, paramrows, encoding=encoding)
+    corpus.write_rows(second_file, *make_second(grouprows, paramrows),
+                      encoding=encoding)
+    entries = rsparam.read_entries(first_file, encoding=encoding)
+
+    benchmarks = [
+        ('read_entries',
+         lambda: rsparam.read_entries(first_file, encoding=encoding)),
+        ('write_entries',
+         lambda: rsparam.write_entries(entries, out_file, encoding=encoding)),
+        ('find',
+         lambda: rsparam.find(first_file, 'Fire Rating', encoding=encoding)),
+        ('find_duplicates',
+         lambda: rsparam.find_duplicates(first_file, encoding=encoding)),
+        ('compare',
+         lambda: rsparam.compare(first_file, second_file,
+                                 encoding=encoding)),
+        ('merge',
+         lambda: rsparam.merge([first_file, second_file],
+                               encoding=encoding)),
+        ('subtract',
+         lambda: rsparam.subtract(first_file, [second_file],
+                                  encoding=encoding)),
+        ]
+
+    results = []
+    for name, func in benchmarks:
+        seconds = timeit(func, repeat)
+        results.append({'function': name, 'params': size,
+                        'seconds': seconds})
+        print('{:<16} {:>9} params {:>10.4f} s'.format(name, size, seconds),
+              file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes',
+                        default=','.join(str(x) for x in DEFAULT_SIZES),
+                        help='comma separated param counts')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per benchmark, fastest is reported')
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--output', default=None,
+                        help='json results file, defaults to stdout')
+    opts = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='rsparam-bench-')
+    try:
+        results = []
+        for size in (int(x) for x in opts.sizes.split(',')):
+            results.extend(run_size(work_dir, size, opts.repeat,
+                                    opts.encoding))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'rsparam': rsparam.__version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'encoding': opts.encoding,
+        'repeat': opts.repeat,
+        'results': results,
+        }
+    if opts.output:
+        with open(opts.output, 'w') as jf:
+            json.dump(report, jf, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,22 @@
 """Utilities for working with Revit shared parameter files."""
 
+import os
 import re
+import sys
 
 import codecs
 import csv
+import fnmatch
+import hashlib
+import io
 import locale
-from collections import namedtuple, defaultdict
+import math
+import pickle
+import time
+from array import array
+from collections import namedtuple, defaultdict, OrderedDict
+from itertools import chain
+from operator import attrgetter
 
 
 # pylama:ignore=D105
@@ -16,167 +27,851 @@ __sparamversion__ = (2, 1)
 
 
 SharedParamEntries = namedtuple('SharedParamEntries', ['groups', 'params'])
+SharedParamChange = namedtuple('SharedParamChange',
+                               ['first', 'second', 'fields'])
+SharedParamRef = namedtuple('SharedParamRef',
+                            ['src_file', 'lineno', 'name', 'datatype'])
+SharedParamScan = namedtuple('SharedParamScan',
+                             ['index', 'conflicts', 'errors'])
+SharedParamIssue = namedtuple('SharedParamIssue',
+                              ['lineno', 'rule', 'message'])
+SharedParamDigest = namedtuple('SharedParamDigest', ['digest', 'groups'])
+SharedParamConflict = namedtuple('SharedParamConflict',
+                                 ['base', 'ours', 'theirs', 'fields'])
+
+# policies for resolving params against groups with duplicate guids
+DUPL_GROUP_FIRST = 'first'
+DUPL_GROUP_LAST = 'last'
+DUPL_GROUP_ERROR = 'error'
+
+# param datatypes accepted by check(), besides any datatype starting
+# with one of the discipline prefixes
+DATATYPES = frozenset([
+    'TEXT', 'MULTILINETEXT', 'INTEGER', 'NUMBER', 'LENGTH', 'AREA', 'VOLUME',
+    'ANGLE', 'SLOPE', 'CURRENCY', 'MASS_DENSITY', 'URL', 'MATERIAL',
+    'YESNO', 'IMAGE', 'FAMILYTYPE', 'LOADCLASSIFICATION',
+    'LOAD_CLASSIFICATION', 'NUMBER_OF_POLES', 'FIXTURE_UNIT',
+    'TIMEINTERVAL', 'SPEED', 'MASS', 'MASS_PER_UNIT_LENGTH',
+    'MASS_PER_UNIT_AREA', 'ROTATION_ANGLE', 'PIPE_DIMENSION',
+    'COLOR_TEMPERATURE', 'DISTANCE', 'COST_RATE_ENERGY', 'COST_RATE_POWER',
+    'COST_PER_AREA',
+    # structural
+    'FORCE', 'LINEAR_FORCE', 'AREA_FORCE', 'MOMENT', 'LINEAR_MOMENT',
+    'STRESS', 'UNIT_WEIGHT', 'WEIGHT', 'WEIGHT_PER_UNIT_LENGTH',
+    'THERMAL_EXPANSION', 'POINT_SPRING_COEFFICIENT',
+    'LINE_SPRING_COEFFICIENT', 'AREA_SPRING_COEFFICIENT',
+    'ROTATIONAL_POINT_SPRING_COEFFICIENT',
+    'ROTATIONAL_LINE_SPRING_COEFFICIENT', 'FORCE_PER_LENGTH',
+    'LINEAR_FORCE_PER_LENGTH', 'AREA_FORCE_PER_LENGTH',
+    'FORCE_LENGTH_PER_ANGLE', 'LINEAR_FORCE_LENGTH_PER_ANGLE',
+    'DISPLACEMENT_DEFLECTION', 'ROTATION', 'PERIOD', 'FREQUENCY',
+    'PULSATION', 'ACCELERATION', 'ENERGY', 'REINFORCEMENT_VOLUME',
+    'REINFORCEMENT_LENGTH', 'REINFORCEMENT_AREA',
+    'REINFORCEMENT_AREA_PER_UNIT_LENGTH', 'REINFORCEMENT_SPACING',
+    'REINFORCEMENT_COVER', 'BAR_DIAMETER', 'CRACK_WIDTH',
+    'SECTION_DIMENSION', 'SECTION_PROPERTY', 'SECTION_AREA',
+    'SECTION_MODULUS', 'MOMENT_OF_INERTIA', 'WARPING_CONSTANT',
+    'SURFACE_AREA', 'SURFACE_AREA_PER_UNIT_LENGTH',
+    # thermal and moisture
+    'ISOTHERMAL_MOISTURE_CAPACITY', 'POROSITY', 'PERMEABILITY',
+    'THERMAL_GRADIENT_COEFFICIENT_FOR_MOISTURE_CAPACITY',
+    ])
+DATATYPE_PREFIXES = ('HVAC_', 'ELECTRICAL_', 'PIPING_', 'STRUCTURAL_',
+                     'ENERGY_', 'WIRE_', 'autodesk.spec')
+
+# check rules that are reported but do not make a file invalid, datatypes
+# are added with new Revit versions so unknown ones may still be valid
+WARNING_RULES = frozenset(['unknown-datatype'])
+
+# rows are tag followed by this many fields
+PARAM_FIELDS = 8
+GROUP_FIELDS = 2
+
+# persistent parse cache settings, see enable_cache()
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'rsparam')
+CACHE_MAXSIZE = 256 * 1024 * 1024
+CACHE_FORMAT = 2
+# number of rows pickled together in cache files
+CACHE_CHUNKSIZE = 4096
+
+# phase timings collected when enabled, see enable_timings()
+_timing_settings = {}
+_clock = getattr(time, 'perf_counter', time.time)
+
+# number of lines buffered by write_entries between writes
+WRITE_CHUNKSIZE = 4096
+_cache_settings = {}
+
+# shared copies of repeating enum-like field values
+_interned = {}
+
+
+def _intern(value):
+    return _interned.setdefault(value, value)
+
+
+def _keyfield(field):
+    # property of a field that is part of the identity key, stored in slot
+    # _<field>. assigning it clears the computed key and hash
+    slot = '_' + field
+
+    def setfield(self, value):
+        setattr(self, slot, value)
+        self._key = None
+        self._hash = None
+
+    return property(attrgetter(slot), setfield)
 
 
 class SharedParamFileItem(object):
+    __slots__ = ('lineno', '_key', '_hash')
+
+    # data fields compared between items with the same guid
+    datafields = ()
+
     def __init__(self, lineno):
         # make line number start from 1
         self.lineno = lineno + 1
+        self._key = None
+        self._hash = None
 
     def __contains__(self, key):
-        for value in self:
-            if bool(re.findall(key, str(value))):
+        return self.matches(re.compile(key))
+
+    def matches(self, pattern, fields=None):
+        """Check if compiled regex pattern matches any of the given fields.
+
+        All fields are searched when fields is None. Fields not defined on
+        this item are skipped.
+        """
+        if fields is None:
+            values = iter(self)
+        else:
+            values = (getattr(self, x, None) for x in fields)
+        for value in values:
+            if value is not None and pattern.search(str(value)):
                 return True
         return False
 
+    @property
+    def key(self):
+        """Identity key of item, computed once on first access.
+
+        Assigning guid or a data field clears the computed key and hash,
+        items should not be changed while in a set or used as dict keys.
+        """
+        if self._key is None:
+            self._key = self._keygetter(self)
+        return self._key
+
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        if not isinstance(other, SharedParamFileItem):
+            return NotImplemented
+        return self.__class__ is other.__class__ and self.key == other.key
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.key)
+        return self._hash
+
+    def __getstate__(self):
+        # cached hash is not valid in other processes
+        state = {}
+        for cls in self.__class__.__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                state[slot] = getattr(self, slot)
+        state['_hash'] = None
+        return state
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
 
 
 class SharedParamGroup(SharedParamFileItem):
+    __slots__ = ('_guid', '_desc')
+
+    datafields = ('desc',)
+    _keygetter = attrgetter('_guid', '_desc')
+
+    guid = _keyfield('guid')
+    desc = _keyfield('desc')
+    # groups are named by their description
+    name = property(attrgetter('_desc'))
+
     def __init__(self, args, lineno=None):
         super(SharedParamGroup, self).__init__(lineno)
-        self.guid = args[0]
-        self.desc = args[1]
-        self.name = self.desc
+        self._guid = args[0]
+        self._desc = args[1]
 
     def __str__(self):
         return self.desc
 
     def __iter__(self):
-        return iter([self.guid, self.desc])
+        return iter([self._guid, self._desc])
 
     def __repr__(self):
         return '<{} desc:"{}" guid:{}>'.format(self.__class__.__name__,
                                                self.desc, self.guid)
 
-    def __hash__(self):
-        return hash(self.guid + self.desc)
-
 
 class SharedParam(SharedParamFileItem):
+    __slots__ = ('_guid', '_name', '_datatype', '_datacategory', 'group',
+                 '_visible', '_desc', '_usermod')
+
+    datafields = ('name', 'datatype', 'datacategory',
+                  'visible', 'desc', 'usermod')
+    _keygetter = attrgetter('_guid', *('_' + x for x in datafields))
+
+    guid = _keyfield('guid')
+    name = _keyfield('name')
+    datatype = _keyfield('datatype')
+    datacategory = _keyfield('datacategory')
+    visible = _keyfield('visible')
+    desc = _keyfield('desc')
+    usermod = _keyfield('usermod')
+
     def __init__(self, args, lineno=None):
         super(SharedParam, self).__init__(lineno)
-        self.guid = args[0]
-        self.name = args[1]
-        self.datatype = args[2]
-        self.datacategory = args[3]
+        self._guid = args[0]
+        self._name = args[1]
+        self._datatype = _intern(args[2])
+        self._datacategory = _intern(args[3])
         self.group = args[4]
-        self.visible = args[5]
-        self.desc = args[6]
-        self.usermod = args[7]
+        self._visible = _intern(args[5])
+        self._desc = args[6]
+        self._usermod = _intern(args[7])
 
     def __str__(self):
         return self.desc
 
     def __iter__(self):
-        return iter([self.guid, self.name, self.datatype,
-                     self.datacategory, self.group, self.visible,
-                     self.desc, self.usermod])
+        return iter([self._guid, self._name, self._datatype,
+                     self._datacategory, self.group, self._visible,
+                     self._desc, self._usermod])
 
     def __repr__(self):
         return '<{} name:"{}" guid:{}>'.format(self.__class__.__name__,
                                                self.name, self.guid)
 
-    def __hash__(self):
-        return hash(self.guid + self.name
-                    + self.datatype + self.datacategory
-                    + self.visible + self.desc + self.usermod)
 
+class _TextColumn(object):
+    # text values packed into one utf-8 buffer with the end offset of each
+    __slots__ = ('_data', '_ends')
 
-def read_entries(src_file, encoding=None):
-    # open file and collect shared param and groups
-    spgroups = []
-    sparams = []
-    with codecs.open(src_file, 'r', encoding) as spf:
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array('I')
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, idx):
+        start = self._ends[idx - 1] if idx else 0
+        return self._data[start:self._ends[idx]].decode('utf-8')
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def append(self, value):
+        self._data += value.encode('utf-8')
+        self._ends.append(len(self._data))
+
+
+class SharedParamTable(object):
+    """Columnar storage for shared params.
+
+    Fields are kept in parallel columns instead of one object per param.
+    Text fields are packed into one buffer per column, and enum-like
+    fields are stored once per distinct value and referenced by index.
+    Iterating the table yields SharedParam instances.
+    """
+
+    textcolumns = ('guid', 'name', 'desc')
+    enumcolumns = ('datatype', 'datacategory', 'group', 'visible', 'usermod')
+
+    # positions of columns in the fields of a PARAM row
+    _fieldindex = {'guid': 0, 'name': 1, 'datatype': 2, 'datacategory': 3,
+                   'group': 4, 'visible': 5, 'desc': 6, 'usermod': 7}
+
+    def __init__(self, sparams=None, groups=None):
+        # group guid -> SharedParamGroup used to resolve the group column
+        self.groups = {}
+        self._text = {x: _TextColumn() for x in self.textcolumns}
+        self._codes = {x: array('I') for x in self.enumcolumns}
+        self._values = {x: [] for x in self.enumcolumns}
+        self._valuecodes = {x: {} for x in self.enumcolumns}
+        self._lineno = array('I')
+        for spgroup in groups or []:
+            self.groups.setdefault(spgroup.guid, spgroup)
+        for sparam in sparams or []:
+            self.append(sparam)
+
+    def __len__(self):
+        return len(self._lineno)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('table index out of range')
+        sparam = SharedParam(self._fields(idx), lineno=self._lineno[idx] - 1)
+        sparam.group = self.groups.get(sparam.group, sparam.group)
+        return sparam
+
+    def __repr__(self):
+        return '<{} params:{} groups:{}>'.format(self.__class__.__name__,
+                                                 len(self), len(self.groups))
+
+    def _fields(self, idx):
+        # fields of param at idx in PARAM row order, group by guid
+        fields = [None] * len(self._fieldindex)
+        for col in self.textcolumns:
+            fields[self._fieldindex[col]] = self._text[col][idx]
+        for col in self.enumcolumns:
+            fields[self._fieldindex[col]] = \
+                self._values[col][self._codes[col][idx]]
+        return fields
+
+    def append(self, sparam):
+        group = sparam.group
+        if isinstance(group, SharedParamGroup):
+            self.groups.setdefault(group.guid, group)
+            group = group.guid
+        self.append_row([sparam.guid, sparam.name, sparam.datatype,
+                         sparam.datacategory, group, sparam.visible,
+                         sparam.desc, sparam.usermod],
+                        lineno=sparam.lineno - 1)
+
+    def append_row(self, fields, lineno):
+        """Append param from fields of a PARAM row without the tag.
+
+        lineno starts from 0 as for SharedParam. The group field is the
+        group guid, resolved through the groups of the table.
+        """
+        for col in self.textcolumns:
+            self._text[col].append(fields[self._fieldindex[col]])
+        for col in self.enumcolumns:
+            value = fields[self._fieldindex[col]]
+            valuecodes = self._valuecodes[col]
+            code = valuecodes.get(value)
+            if code is None:
+                code = valuecodes[value] = len(self._values[col])
+                self._values[col].append(value)
+            self._codes[col].append(code)
+        self._lineno.append(lineno + 1)
+
+    def column(self, name):
+        """Return values of given column, resolving enum-like columns."""
+        if name in self._text:
+            return list(self._text[name])
+        elif name == 'lineno':
+            return list(self._lineno)
+        values = self._values[name]
+        return [values[x] for x in self._codes[name]]
+
+    def select(self, **criteria):
+        """Return a new table of params matching all column=value criteria.
+
+        Enum-like columns are matched by comparing their value indices.
+        """
+        indices = range(len(self))
+        for col, value in criteria.items():
+            if col in self._text:
+                colvalues = self._text[col]
+                indices = [x for x in indices if colvalues[x] == value]
+            else:
+                code = self._valuecodes[col].get(getattr(value, 'guid', value))
+                colcodes = self._codes[col]
+                indices = [x for x in indices if colcodes[x] == code]
+
+        subtable = SharedParamTable()
+        subtable.groups = self.groups
+        for idx in indices:
+            subtable.append_row(self._fields(idx),
+                                lineno=self._lineno[idx] - 1)
+        return subtable
+
+
+def _index_group(group_lut, spgroup, dupl_policy):
+    if spgroup.guid in group_lut:
+        if dupl_policy == DUPL_GROUP_ERROR:
+            raise ValueError(
+                'duplicate group guid "{}" at line {} (first at line {})'
+                .format(spgroup.guid, spgroup.lineno,
+                        group_lut[spgroup.guid].lineno)
+                )
+        elif dupl_policy == DUPL_GROUP_FIRST:
+            return
+    group_lut[spgroup.guid] = spgroup
+
+
+def enable_cache(cache_dir=None, maxsize=CACHE_MAXSIZE):
+    """Cache parsed shared param files on disk.
+
+    Cached parses are keyed by file path, size, modification time and
+    encoding. Least recently used cache files are removed once the cache
+    directory grows over maxsize bytes.
+    """
+    _cache_settings['dir'] = cache_dir or CACHE_DIR
+    _cache_settings['maxsize'] = maxsize
+
+
+def disable_cache():
+    """Stop using the persistent parse cache."""
+    _cache_settings.clear()
+
+
+def enable_timings():
+    """Record wall time and item counts of processing phases.
+
+    Phases are e.g. cache loads, parsing, group resolution, set
+    operations and sorting. Items parsed while streaming are counted in
+    the phase consuming them.
+    """
+    _timing_settings['phases'] = OrderedDict()
+
+
+def disable_timings():
+    """Stop recording phase timings."""
+    _timing_settings.clear()
+
+
+def get_timings():
+    """Return list of (phase, seconds, items) recorded since enabled."""
+    phases = _timing_settings.get('phases', {})
+    return [(k, v[0], v[1]) for k, v in phases.items()]
+
+
+class timed(object):
+    """Context manager recording wall time of a phase when enabled.
+
+    Set the items attribute to record the number of items processed.
+    """
+
+    __slots__ = ('phase', 'items', '_start')
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.items = 0
+
+    def __enter__(self):
+        self._start = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # phases ending in errors are not recorded
+        phases = _timing_settings.get('phases')
+        if phases is not None and exc_type is None:
+            timing = phases.setdefault(self.phase, [0.0, 0])
+            timing[0] += _clock() - self._start
+            timing[1] += self.items
+
+
+def _cache_path(src_file, encoding):
+    src_file = os.path.abspath(src_file)
+    src_stat = os.stat(src_file)
+    cache_key = repr((CACHE_FORMAT, sys.version_info[0],
+                      src_file, src_stat.st_size, src_stat.st_mtime,
+                      encoding))
+    return os.path.join(_cache_settings['dir'],
+                        hashlib.sha1(cache_key.encode('utf-8')).hexdigest()
+                        + '.cache')
+
+
+def _evict_cache():
+    cache_dir = _cache_settings['dir']
+    cache_files = []
+    for cache_name in os.listdir(cache_dir):
+        if cache_name.endswith('.cache'):
+            cache_stat = os.stat(os.path.join(cache_dir, cache_name))
+            cache_files.append((cache_stat.st_mtime, cache_stat.st_size,
+                                cache_name))
+
+    cache_size = sum(x[1] for x in cache_files)
+    for _, size, cache_name in sorted(cache_files):
+        if cache_size <= _cache_settings['maxsize']:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, cache_name))
+            cache_size -= size
+        except OSError:
+            pass
+
+
+def _detect_encoding(data, encoding=None):
+    # byte order marks take precedence over the given encoding, which
+    # could not decode the file otherwise
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    elif data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    return encoding or locale.getpreferredencoding(False)
+
+
+def _read_file_rows(src_file, encoding):
+    # yield line number and fields of GROUP and PARAM lines. lines are
+    # decoded as they are read, so memory stays flat over large files
+    with io.open(src_file, 'rb') as spf:
+        spencoding = _detect_encoding(spf.read(4), encoding)
+        spf.seek(0)
+        lines = io.TextIOWrapper(spf, encoding=spencoding, newline='')
+
+        # shared param files are not quoted unless a field contains tabs,
+        # quotes or line breaks, so only lines with quotes go through csv.
+        # csv reads on over the next lines only while a field opened with
+        # a quote is not closed
         count = 0
-        for line in csv.reader(spf, delimiter="\t"):
-            if len(line) >= 1:
-                if line[0] == 'PARAM':
-                    sparam = SharedParam(line[1:], lineno=count)
-                    sparams.append(sparam)
-                elif line[0] == 'GROUP':
-                    spgroup = SharedParamGroup(line[1:], lineno=count)
-                    spgroups.append(spgroup)
+        for line in lines:
+            lineno = count
             count += 1
+            if line[:5] not in ('PARAM', 'GROUP'):
+                continue
+            if '"' in line:
+                rowreader = csv.reader(chain([line], lines), delimiter="\t")
+                fields = next(rowreader)
+                count += rowreader.line_num - 1
+            else:
+                fields = line.rstrip('\r\n').split('\t')
+            if fields[0] in ('PARAM', 'GROUP'):
+                yield lineno, fields
 
-    # now update sparams with group obj
-    for sp in sparams:
-        for spg in spgroups:
-            if sp.group == spg.guid:
-                sp.group = spg
 
-    return SharedParamEntries(spgroups, sparams)
+def _load_cached_rows(cache_file):
+    # yield rows of cache file, which holds pickled chunks of rows ending
+    # with None. raises if the cache file is missing or incomplete
+    with open(cache_file, 'rb') as cf:
+        # mark as recently used for eviction
+        os.utime(cache_file, None)
+        while True:
+            with timed('cache load') as phase:
+                rows = pickle.load(cf)
+                phase.items = len(rows) if rows else 0
+            if rows is None:
+                return
+            for row in rows:
+                yield row
 
 
-def write_entries(entries, out_file, encoding=None):
-    with codecs.open(out_file, 'w', encoding) as spf:
-        spf.write("# This is a Revit shared parameter file.\r\n")
-        spf.write("# Do not edit manually unless you know better!\r\n")
-        spf.write("*META\tVERSION\tMINVERSION\r\n")
-        spf.write("META\t{max_ver}\t{min_ver}\r\n"
-                  .format(max_ver=__sparamversion__[0],
-                          min_ver=__sparamversion__[1]))
-
-        sparamwriter = csv.writer(spf, delimiter="\t")
-
-        # write groups referenced by SharedParam instances and in entries
-        spf.write("*GROUP\tID\tNAME\r\n")
-        if isinstance(entries, SharedParamEntries):
-            refgroups = {x.group for x in entries.params}
-            spgroups = {x for x in entries.groups}
+def _read_cached_rows(src_file, encoding):
+    # rows are yielded as chunks are loaded or parsed, so the cache does
+    # not hold the whole file in memory
+    cache_file = _cache_path(src_file, encoding)
+    count = 0
+    try:
+        for row in _load_cached_rows(cache_file):
+            yield row
+            count += 1
+        return
+    except Exception:
+        pass
+
+    # parse the file, continuing after rows already yielded from a broken
+    # cache file, and write the cache file as rows are parsed
+    temp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+    try:
+        if not os.path.isdir(_cache_settings['dir']):
+            os.makedirs(_cache_settings['dir'])
+        cf = open(temp_file, 'wb')
+    except (IOError, OSError):
+        cf = None
+
+    cached = False
+    try:
+        rows = []
+        for idx, row in enumerate(_read_file_rows(src_file, encoding)):
+            if idx >= count:
+                yield row
+            if cf is not None:
+                rows.append(row)
+                if len(rows) >= CACHE_CHUNKSIZE:
+                    cf = _dump_rows(cf, rows)
+                    rows = []
+        if cf is not None:
+            cf = _dump_rows(cf, rows)
+        if cf is not None:
+            cf = _dump_rows(cf, None)
+        if cf is not None:
+            cf.close()
+            cf = None
+            try:
+                getattr(os, 'replace', os.rename)(temp_file, cache_file)
+                cached = True
+                _evict_cache()
+            except OSError:
+                pass
+    finally:
+        # files not read to the end are not cached
+        if cf is not None:
+            cf.close()
+        if not cached:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+
+
+def _dump_rows(cf, rows):
+    # append pickled rows to open cache file. returns None, closing the
+    # file, if it could not be written
+    try:
+        pickle.dump(rows, cf, pickle.HIGHEST_PROTOCOL)
+        return cf
+    except (IOError, OSError):
+        cf.close()
+        return None
+
+
+def _read_rows(src_file, encoding):
+    if _cache_settings:
+        return _read_cached_rows(src_file, encoding)
+    return _read_file_rows(src_file, encoding)
+
+
+def _check_dupl_policy(dupl_groups):
+    if dupl_groups not in (DUPL_GROUP_FIRST, DUPL_GROUP_LAST,
+                           DUPL_GROUP_ERROR):
+        raise ValueError('unknown duplicate group policy: {}'
+                         .format(dupl_groups))
+
+
+def _iter_items(rows, dupl_groups):
+    _check_dupl_policy(dupl_groups)
+
+    group_lut = {}
+    for count, line in rows:
+        if line[0] == 'PARAM':
+            sparam = SharedParam(line[1:], lineno=count)
+            sparam.group = group_lut.get(sparam.group, sparam.group)
+            yield sparam
         else:
-            refgroups = {x.group for x in entries if isinstance(x, SharedParam)}
-            spgroups = {x for x in entries if isinstance(x, SharedParamGroup)}
-        spgroups = spgroups.union(refgroups)
-        sys_language = locale.getdefaultlocale(locale.LC_ALL)[0]
-        try:
-            locale.setlocale(locale.LC_ALL, "{}.UTF-8".format(sys_language))
-        except locale.Error:  # Fix for python/ironpython 2
-            locale.setlocale(locale.LC_ALL, sys_language)
-        for spg in sorted(spgroups, key=lambda x: locale.strxfrm(x.name)):
-            sparamwriter.writerow(['GROUP', spg.guid, spg.name])
+            spgroup = SharedParamGroup(line[1:], lineno=count)
+            _index_group(group_lut, spgroup, dupl_groups)
+            yield spgroup
+
+
+def _collect_table(rows, dupl_groups):
+    # collect groups and a table of params, param fields go straight from
+    # rows into the table columns without building SharedParam objects
+    _check_dupl_policy(dupl_groups)
+    spgroups = []
+    sparams = SharedParamTable()
+    group_lut = {}
+    with timed('parse') as phase:
+        for count, line in rows:
+            if line[0] == 'PARAM':
+                sparams.append_row(line[1:], lineno=count)
+            else:
+                spgroup = SharedParamGroup(line[1:], lineno=count)
+                spgroups.append(spgroup)
+                _index_group(group_lut, spgroup, dupl_groups)
+        phase.items = len(spgroups) + len(sparams)
+
+    # table resolves param groups on access
+    sparams.groups = group_lut
+    return SharedParamEntries(spgroups, sparams)
+
+
+def _collect_entries(spitems, dupl_groups):
+    # collect shared param and groups
+    spgroups = []
+    sparams = []
+    group_lut = {}
+    with timed('parse') as phase:
+        for spitem in spitems:
+            if isinstance(spitem, SharedParam):
+                sparams.append(spitem)
+            else:
+                spgroups.append(spitem)
+                _index_group(group_lut, spitem, dupl_groups)
+        phase.items = len(spgroups) + len(sparams)
+
+    # now update sparams whose final group differs from the one resolved
+    # while reading e.g. params defined before their group
+    with timed('resolve groups') as phase:
+        for sp in sparams:
+            groupid = getattr(sp.group, 'guid', sp.group)
+            sp.group = group_lut.get(groupid, sp.group)
+        phase.items = len(sparams)
+
+    return SharedParamEntries(spgroups, sparams)
+
+
+def iter_entries(src_file, encoding=None, dupl_groups=DUPL_GROUP_FIRST):
+    """Yield shared param groups and params in the order they are read.
+
+    Param group references are resolved against the groups read so far, so
+    params can be consumed without loading the whole file into memory.
+    dupl_groups sets which of the groups sharing a guid params resolve to:
+    DUPL_GROUP_FIRST, DUPL_GROUP_LAST or DUPL_GROUP_ERROR to raise ValueError.
+    Lines are read from the persistent parse cache when enabled.
+    """
+    return _iter_items(_read_rows(src_file, encoding), dupl_groups)
+
+
+def read_entries(src_file, encoding=None, dupl_groups=DUPL_GROUP_FIRST,
+                 columnar=False):
+    """Read all shared param groups and params from file.
+
+    When columnar is True, the params are returned as a SharedParamTable.
+    """
+    if columnar:
+        return _collect_table(_read_rows(src_file, encoding), dupl_groups)
+    return _collect_entries(iter_entries(src_file, encoding=encoding,
+                                         dupl_groups=dupl_groups),
+                            dupl_groups)
+
+
+def _format_row(fields):
+    line = '\t'.join(fields)
+    # only rows with tabs, quotes or line breaks in fields need csv quoting
+    if line.count('\t') != len(fields) - 1 \
+            or '"' in line or '\r' in line or '\n' in line:
+        rowbuffer = io.StringIO()
+        csv.writer(rowbuffer, delimiter="\t").writerow(fields)
+        return rowbuffer.getvalue()
+    return line + '\r\n'
+
+
+def _write_entries(entries, spf):
+    spf.write("# This is a Revit shared parameter file.\r\n")
+    spf.write("# Do not edit manually unless you know better!\r\n")
+    spf.write("*META\tVERSION\tMINVERSION\r\n")
+    spf.write("META\t{max_ver}\t{min_ver}\r\n"
+              .format(max_ver=__sparamversion__[0],
+                      min_ver=__sparamversion__[1]))
+
+    if isinstance(entries, SharedParamEntries):
+        spgroups = set(entries.groups)
+        sparams = set(entries.params)
+    else:
+        spgroups = set()
+        sparams = set()
+        for spitem in entries:
+            if isinstance(spitem, SharedParam):
+                sparams.add(spitem)
+            else:
+                spgroups.add(spitem)
+
+    # write groups referenced by SharedParam instances and in entries
+    spgroups.update(x.group for x in sparams)
+
+    # sort by collation key of current locale computed once per item
+    # guid and identity key make the order of same name items stable
+    strxfrm = locale.strxfrm
+    with timed('sort') as phase:
+        spgroups = sorted((strxfrm(x.name), x.guid, x) for x in spgroups)
+        sparams = sorted((strxfrm(x.name), x.key, x) for x in sparams)
+        phase.items = len(spgroups) + len(sparams)
+
+    with timed('write') as phase:
+        chunk = []
+        chunk.append("*GROUP\tID\tNAME\r\n")
+        for _, _, spg in spgroups:
+            chunk.append(_format_row(['GROUP', spg.guid, spg.name]))
+        spf.write(''.join(chunk))
 
         # write SharedParam in entries
-        spf.write("*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\t"
-                  "VISIBLE\tDESCRIPTION\tUSERMODIFIABLE\r\n")
-        if isinstance(entries, SharedParamEntries):
-            sparams = {x for x in entries.params}
-        else:
-            sparams = {x for x in entries if isinstance(x, SharedParam)}
-        for sp in sorted(sparams, key=lambda x: locale.strxfrm(x.name)):
-            sparamwriter.writerow(
+        chunk = []
+        chunk.append("*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\t"
+                     "VISIBLE\tDESCRIPTION\tUSERMODIFIABLE\r\n")
+        for _, _, sp in sparams:
+            chunk.append(_format_row(
                 ['PARAM', sp.guid, sp.name, sp.datatype, sp.datacategory,
                  sp.group.guid, sp.visible, sp.desc, sp.usermod]
-                )
+                ))
+            if len(chunk) >= WRITE_CHUNKSIZE:
+                spf.write(''.join(chunk))
+                chunk = []
+        spf.write(''.join(chunk))
+        phase.items = len(spgroups) + len(sparams)
+
+
+def write_entries(entries, out_file, encoding=None):
+    """Write groups and params to a shared param file, sorted by name.
+
+    out_file is a file path or a writable text stream e.g. sys.stdout.
+    Names are sorted using the collation of the current locale, which is
+    left unchanged. Groups referenced by params are written as well.
+    """
+    if hasattr(out_file, 'write'):
+        _write_entries(entries, out_file)
+        return
+
+    with io.open(out_file, 'w', encoding=encoding, newline='') as spf:
+        _write_entries(entries, spf)
 
 
 def get_paramgroups(src_file, encoding=None):
-    spgroups, sparams = read_entries(src_file, encoding=encoding)
-    return spgroups
+    return [x for x in iter_entries(src_file, encoding=encoding)
+            if isinstance(x, SharedParamGroup)]
 
 
-def get_params(src_file, encoding=None, groupid=None):
-    spgroups, sparams = read_entries(src_file, encoding=encoding)
-    if groupid:
-        return [x for x in sparams if x.group.guid == groupid]
+def _iter_params(spitems, groupid=None):
+    for spitem in spitems:
+        if isinstance(spitem, SharedParam):
+            if groupid and getattr(spitem.group, 'guid', spitem.group) \
+                    != groupid:
+                continue
+            yield spitem
+
 
+def iter_params(src_file, encoding=None, groupid=None):
+    return _iter_params(iter_entries(src_file, encoding=encoding),
+                        groupid=groupid)
+
+
+def _record_groups(spitems, spgroups):
+    # pass items through, appending groups to spgroups
+    for spitem in spitems:
+        if isinstance(spitem, SharedParamGroup):
+            spgroups.append(spitem)
+        yield spitem
+
+
+def _resolve_late_groups(sparams, spgroups):
+    # params read before their group keep its guid while streaming, so
+    # resolve them once all groups are read
+    group_lut = {}
+    for spgroup in spgroups:
+        group_lut.setdefault(spgroup.guid, spgroup)
+    for sparam in sparams:
+        if not isinstance(sparam.group, SharedParamGroup):
+            sparam.group = group_lut.get(sparam.group, sparam.group)
+
+
+def get_params(src_file, encoding=None, groupid=None):
+    spgroups = []
+    sparams = list(_iter_params(
+        _record_groups(iter_entries(src_file, encoding=encoding), spgroups),
+        groupid=groupid
+        ))
+    _resolve_late_groups(sparams, spgroups)
     return sparams
 
 
-def find_duplicates(src_file, encoding=None, byname=False):
+def _find_duplicates(spentries, byname=False):
     param_guid_lut = defaultdict(list)
     group_guid_lut = defaultdict(list)
 
-    spgroups, sparams = read_entries(src_file, encoding=encoding)
-
     duplparam = 'name' if byname else 'guid'
 
-    for sparam in sparams:
-        param_guid_lut[getattr(sparam, duplparam)].append(sparam)
+    with timed('find duplicates') as phase:
+        for sparam in spentries.params:
+            param_guid_lut[getattr(sparam, duplparam)].append(sparam)
 
-    for spgroup in spgroups:
-        group_guid_lut[getattr(spgroup, duplparam)].append(spgroup)
+        for spgroup in spentries.groups:
+            group_guid_lut[getattr(spgroup, duplparam)].append(spgroup)
+        phase.items = len(spentries.params) + len(spentries.groups)
 
     duplgroups = [v for k, v in group_guid_lut.items() if len(v) > 1]
     duplparams = [v for k, v in param_guid_lut.items() if len(v) > 1]
@@ -184,34 +879,552 @@ def find_duplicates(src_file, encoding=None, byname=False):
     return SharedParamEntries(duplgroups, duplparams)
 
 
-def find(src_file, searchstr, encoding=None):
-    spgroups, sparams = read_entries(src_file, encoding=encoding)
-    matchedgroups = [x for x in spgroups if searchstr in x]
-    matchedparams = [x for x in sparams if searchstr in x]
+def find_duplicates(src_file, encoding=None, byname=False):
+    return _find_duplicates(read_entries(src_file, encoding=encoding),
+                            byname=byname)
+
+
+def _name_key(name):
+    # names differing only in case, spaces or punctuation share a key
+    return re.sub(r'[\W_]+', '', name.lower(), flags=re.UNICODE)
+
+
+def _name_grams(namekey):
+    # set of character trigrams of name key padded at both ends
+    padded = '^{}$'.format(namekey)
+    return set(padded[x:x + 3] for x in range(max(len(padded) - 2, 1)))
+
+
+def _similar_clusters(spitems, threshold):
+    # clusters of items with dice similarity of name trigrams at or above
+    # threshold. names are scored only against names sharing one of their
+    # rarest trigrams (prefix filtering) with a compatible number of
+    # trigrams (length filtering), instead of against every other name
+    key_lut = OrderedDict()
+    for spitem in spitems:
+        key_lut.setdefault(_name_key(spitem.name), []).append(spitem)
+    keys = list(key_lut)
+    keygrams = [_name_grams(x) for x in keys]
+    gramcounts = [len(x) for x in keygrams]
+
+    gramfreq = defaultdict(int)
+    for grams in keygrams:
+        for gram in grams:
+            gramfreq[gram] += 1
+
+    parents = list(range(len(keys)))
+
+    def find_root(idx):
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    # names are scored against earlier names with as many or fewer
+    # trigrams. a pair with dice >= threshold shares at least
+    # minoverlap = threshold * (len1 + len2) / 2 trigrams
+    postings = defaultdict(list)
+    postingstart = defaultdict(int)
+    for idx in sorted(range(len(keys)), key=gramcounts.__getitem__):
+        grams = keygrams[idx]
+        gramcount = gramcounts[idx]
+        minlen = threshold * gramcount / (2.0 - threshold)
+        ordered = sorted(grams, key=lambda x: (gramfreq[x], x))
+        # probe with grams that leave too few for the minimum overlap
+        # with a name of minlen trigrams, index the shorter prefix needed
+        # against later names with at least as many trigrams
+        probelen = gramcount + 1 - int(math.ceil(minlen - 1e-9))
+        indexlen = gramcount + 1 - int(math.ceil(threshold * gramcount
+                                                 - 1e-9))
+
+        candidates = set()
+        for gram in ordered[:probelen]:
+            gramposting = postings[gram]
+            start = postingstart[gram]
+            while start < len(gramposting) \
+                    and gramcounts[gramposting[start]] < minlen - 1e-9:
+                start += 1
+            postingstart[gram] = start
+            candidates.update(gramposting[start:])
+
+        # names already in the same cluster need not be scored
+        root = find_root(idx)
+        for other in candidates:
+            otherroot = find_root(other)
+            if otherroot == root:
+                continue
+            othergrams = keygrams[other]
+            common = len(grams & othergrams)
+            if 2.0 * common / (gramcount + gramcounts[other]) >= threshold:
+                parents[root] = root = otherroot
+
+        for gram in ordered[:indexlen]:
+            postings[gram].append(idx)
+
+    clusters = OrderedDict()
+    for idx, key in enumerate(keys):
+        clusters.setdefault(find_root(idx), []).extend(key_lut[key])
+    return [x for x in clusters.values() if len(x) > 1]
+
+
+def _check_threshold(threshold):
+    # at 0 every pair of names would be similar, but only names sharing
+    # a trigram are ever scored
+    if not 0 < threshold <= 1:
+        raise ValueError('similarity threshold must be above 0 and at most '
+                         '1: {}'.format(threshold))
+
+
+def _find_similar(spentries, threshold):
+    _check_threshold(threshold)
+    with timed('find similar') as phase:
+        similar = SharedParamEntries(
+            _similar_clusters(spentries.groups, threshold),
+            _similar_clusters(spentries.params, threshold)
+            )
+        phase.items = len(spentries.params) + len(spentries.groups)
+    return similar
+
+
+def find_similar(src_file, threshold=0.8, encoding=None):
+    """Find clusters of groups and params with similar names.
+
+    Names are compared ignoring case, spaces and punctuation, so that e.g.
+    "Fire Rating", "FireRating" and "fire_rating" are in one cluster.
+    Other names are similar when the dice coefficient of their character
+    trigrams is at least threshold (above 0, up to 1). Only names sharing
+    rare trigrams are scored, so all pairs of names are never compared.
+    """
+    _check_threshold(threshold)
+    return _find_similar(read_entries(src_file, encoding=encoding),
+                         threshold)
+
+
+def _iter_matching(spitems, searchstr, fields=None):
+    pattern = re.compile(searchstr)
+    for spitem in spitems:
+        if spitem.matches(pattern, fields=fields):
+            yield spitem
+
+
+def iter_matching(src_file, searchstr, encoding=None, fields=None):
+    return _iter_matching(iter_entries(src_file, encoding=encoding),
+                          searchstr, fields=fields)
+
+
+def _split_entries(spitems):
+    spgroups = []
+    sparams = []
+    for spitem in spitems:
+        if isinstance(spitem, SharedParam):
+            sparams.append(spitem)
+        else:
+            spgroups.append(spitem)
+    return SharedParamEntries(spgroups, sparams)
+
+
+def find(src_file, searchstr, encoding=None, fields=None):
+    """Find groups and params matching regex searchstr.
+
+    Set fields to a list of field names e.g. ['name', 'desc'] to only
+    search those fields.
+    """
+    # groups of params are matched by name, so all groups are resolved
+    # before matching
+    spentries = read_entries(src_file, encoding=encoding)
+    return _split_entries(_iter_matching(chain(spentries.groups,
+                                               spentries.params),
+                                         searchstr, fields=fields))
+
+
+def _combine_patterns(patterns):
+    # single regex matching wherever any of the patterns match, or None if
+    # the patterns can not be safely joined into one alternation
+    searchstrs = [x.pattern for x in patterns]
+    if any(re.search(r'\\[1-9]|\(\?P=', x) for x in searchstrs):
+        return None
+    try:
+        return re.compile('|'.join('(?:{})'.format(x) for x in searchstrs))
+    except re.error:
+        return None
+
+
+def _find_batch(spitems, searchstrs, fields=None):
+    patterns = OrderedDict((x, re.compile(x)) for x in searchstrs)
+    anypattern = _combine_patterns(patterns.values())
+    matches = OrderedDict((x, SharedParamEntries([], [])) for x in patterns)
+    for spitem in spitems:
+        if anypattern and not spitem.matches(anypattern, fields=fields):
+            continue
+        isparam = isinstance(spitem, SharedParam)
+        for searchstr, pattern in patterns.items():
+            if spitem.matches(pattern, fields=fields):
+                if isparam:
+                    matches[searchstr].params.append(spitem)
+                else:
+                    matches[searchstr].groups.append(spitem)
+
+    return matches
+
+
+def find_batch(src_file, searchstrs, encoding=None, fields=None):
+    """Find groups and params matching each of the regex searchstrs.
+
+    The file is read once and each item is first tested against a combined
+    alternation of all patterns, so only items matching at least one
+    pattern are tested against each pattern. Returns an ordered dict of
+    searchstr to SharedParamEntries.
+    """
+    spentries = read_entries(src_file, encoding=encoding)
+    return _find_batch(chain(spentries.groups, spentries.params),
+                       searchstrs, fields=fields)
+
+
+class SharedParamFile(object):
+    """Shared param file that is read once and queried from memory.
+
+    The file is read on first use. Queries made before that stream over
+    the file where possible instead of loading it.
+    """
+
+    def __init__(self, src_file, encoding=None):
+        self.src_file = src_file
+        self.encoding = encoding
+        self._entries = None
+        self._stat = None
+        self._dupls = {}
+        self._similar = {}
+        self._group_params = None
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, self.src_file)
+
+    def _file_stat(self):
+        src_stat = os.stat(self.src_file)
+        return src_stat.st_size, src_stat.st_mtime
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._stat = self._file_stat()
+            self._entries = read_entries(self.src_file,
+                                         encoding=self.encoding)
+        return self._entries
+
+    @property
+    def groups(self):
+        return self.entries.groups
+
+    @property
+    def params(self):
+        return self.entries.params
+
+    def refresh(self):
+        """Drop what was read if the file size or mtime changed on disk.
+
+        Returns True if the file is read again on next use.
+        """
+        if self._entries is None or self._file_stat() == self._stat:
+            return False
+        self._entries = None
+        self._stat = None
+        self._dupls = {}
+        self._similar = {}
+        self._group_params = None
+        return True
+
+    def _items(self):
+        return chain(self.entries.groups, self.entries.params)
+
+    def iter_params(self, groupid=None):
+        if self._entries is None:
+            return iter_params(self.src_file,
+                               encoding=self.encoding, groupid=groupid)
+        return _iter_params(self._entries.params, groupid=groupid)
+
+    def stream_params(self, groupid=None):
+        """Yield params with their groups resolved as the file is read.
+
+        Params are yielded as they are read while their groups come before
+        them in the file. On the first param read before its group, the
+        whole file is read and the remaining params are yielded from it.
+        """
+        if self._entries is None:
+            sparams = self.iter_params(groupid=groupid)
+            count = 0
+            for sparam in sparams:
+                if not isinstance(sparam.group, SharedParamGroup):
+                    sparams.close()
+                    break
+                yield sparam
+                count += 1
+            else:
+                return
+        else:
+            count = 0
+        for sparam in self.get_params(groupid=groupid)[count:]:
+            yield sparam
+
+    def get_paramgroups(self):
+        if self._entries is None:
+            return get_paramgroups(self.src_file, encoding=self.encoding)
+        return list(self.groups)
+
+    def get_params(self, groupid=None):
+        if not groupid:
+            return list(self.params)
+        # params of each group are indexed on first lookup by group
+        if self._group_params is None:
+            self._group_params = defaultdict(list)
+            for sparam in self.params:
+                self._group_params[getattr(sparam.group, 'guid',
+                                           sparam.group)].append(sparam)
+        return list(self._group_params.get(groupid, []))
+
+    def find_duplicates(self, byname=False):
+        if byname not in self._dupls:
+            self._dupls[byname] = _find_duplicates(self.entries,
+                                                   byname=byname)
+        return self._dupls[byname]
+
+    def find_similar(self, threshold=0.8):
+        if threshold not in self._similar:
+            self._similar[threshold] = _find_similar(self.entries, threshold)
+        return self._similar[threshold]
+
+    def find(self, searchstr, fields=None):
+        return _split_entries(_iter_matching(self._items(), searchstr,
+                                             fields=fields))
+
+    def find_batch(self, searchstrs, fields=None):
+        return _find_batch(self._items(), searchstrs, fields=fields)
+
+    def digest(self):
+        """Compute file and group digests, see digest()."""
+        return _entries_digest(self.entries)
+
+    def compare(self, other, modified=False):
+        """Compare with another SharedParamFile, see compare()."""
+        return _compare_entries(self.entries, other.entries,
+                                modified=modified)
+
+
+def _diff_items(items1, items2):
+    # returns items unique to each list, and changes between items that
+    # share a guid but differ in their data fields
+    with timed('set operations') as phase:
+        itemset1 = set(items1)
+        itemset2 = set(items2)
+        uniqitems1 = [x for x in items1 if x not in itemset2]
+        uniqitems2 = [x for x in items2 if x not in itemset1]
+        phase.items = len(items1) + len(items2)
+
+    guid_lut2 = {}
+    for item in uniqitems2:
+        guid_lut2.setdefault(item.guid, item)
+
+    changes = []
+    for item in uniqitems1:
+        other = guid_lut2.get(item.guid)
+        if other is not None:
+            changedfields = [x for x in item.datafields
+                             if getattr(item, x) != getattr(other, x)]
+            changes.append(SharedParamChange(item, other, changedfields))
+
+    return uniqitems1, uniqitems2, changes
 
-    return SharedParamEntries(matchedgroups, matchedparams)
 
+def _item_digest(spitem):
+    # digest of identity key that is the same in every process
+    return int(hashlib.sha1('\x1f'.join(spitem.key).encode('utf-8'))
+               .hexdigest(), 16)
 
-def compare(first_file, second_file, encoding=None):
-    spgroups1, sparams1 = read_entries(first_file, encoding=encoding)
-    spgroups2, sparams2 = read_entries(second_file, encoding=encoding)
 
-    uniqgroups1 = [x for x in spgroups1 if x not in spgroups2]
-    uniqparams1 = [x for x in sparams1 if x not in sparams2]
-    uniqgroups2 = [x for x in spgroups2 if x not in spgroups1]
-    uniqparams2 = [x for x in sparams2 if x not in sparams1]
+def _group_digests(spentries, itemdigest=hash, bits=64):
+    # order-independent digest of each group guid, summing the digests of
+    # the groups with that guid and of their params
+    mask = (1 << bits) - 1
+    digests = defaultdict(int)
+    with timed('digest') as phase:
+        for spgroup in spentries.groups:
+            digests[spgroup.guid] += itemdigest(spgroup)
+        for sparam in spentries.params:
+            digests[getattr(sparam.group, 'guid', sparam.group)] += \
+                itemdigest(sparam)
+        phase.items = len(spentries.groups) + len(spentries.params)
+    return {k: v & mask for k, v in digests.items()}
 
-    return SharedParamEntries(uniqgroups1, uniqparams1), \
-        SharedParamEntries(uniqgroups2, uniqparams2)
 
+def _select_groups(spentries, groupids):
+    # groups and params of the given group guids
+    return SharedParamEntries(
+        [x for x in spentries.groups if x.guid in groupids],
+        [x for x in spentries.params
+         if getattr(x.group, 'guid', x.group) in groupids]
+        )
 
-def merge(source_files, out_file=None, encoding=None):
+
+def digest(src_file, encoding=None):
+    """Compute order-independent digests of file and of each group.
+
+    Group digests are sums of sha1 digests of the identity keys of the
+    group and its params. The file digest sums the sha1 digests of each
+    group guid and group digest. Neither changes when lines are reordered,
+    but both change when a param moves to another group. Returns a
+    SharedParamDigest of the file digest and an ordered dict of group guid
+    to group digest, both as hex strings.
+    """
+    return _entries_digest(read_entries(src_file, encoding=encoding))
+
+
+def _entries_digest(spentries):
+    digests = _group_digests(spentries, itemdigest=_item_digest, bits=160)
+    # group guid is part of each group contribution, so moving a param to
+    # another group changes the file digest
+    filedigest = sum(
+        int(hashlib.sha1('{}\x1f{:040x}'.format(k, v).encode('utf-8'))
+            .hexdigest(), 16)
+        for k, v in digests.items()
+        ) & ((1 << 160) - 1)
+    return SharedParamDigest(
+        '{:040x}'.format(filedigest),
+        OrderedDict((k, '{:040x}'.format(digests[k]))
+                    for k in sorted(digests))
+        )
+
+
+def compare(first_file, second_file, encoding=None, modified=False):
+    """Compare two shared param files.
+
+    Returns the entries unique to each file. When modified is True, items
+    that share a guid but differ in their data fields are reported as a
+    third SharedParamEntries of SharedParamChange and left out of the
+    unique entries.
+    """
+    return _compare_entries(read_entries(first_file, encoding=encoding),
+                            read_entries(second_file, encoding=encoding),
+                            modified=modified)
+
+
+def _compare_entries(spentries1, spentries2, modified=False):
+    # only items of groups whose digest differs can be unique to a file
+    digests1 = _group_digests(spentries1)
+    digests2 = _group_digests(spentries2)
+    changed = set(k for k in set(digests1) | set(digests2)
+                  if digests1.get(k) != digests2.get(k))
+    if len(changed) < max(len(digests1), len(digests2)):
+        spentries1 = _select_groups(spentries1, changed)
+        spentries2 = _select_groups(spentries2, changed)
+
+    spgroups1, sparams1 = spentries1
+    spgroups2, sparams2 = spentries2
+
+    uniqgroups1, uniqgroups2, modgroups = _diff_items(spgroups1, spgroups2)
+    uniqparams1, uniqparams2, modparams = _diff_items(sparams1, sparams2)
+
+    if not modified:
+        return SharedParamEntries(uniqgroups1, uniqparams1), \
+            SharedParamEntries(uniqgroups2, uniqparams2)
+
+    modgroups1 = {x.first for x in modgroups}
+    modgroups2 = {x.second for x in modgroups}
+    modparams1 = {x.first for x in modparams}
+    modparams2 = {x.second for x in modparams}
+    return SharedParamEntries(
+        [x for x in uniqgroups1 if x not in modgroups1],
+        [x for x in uniqparams1 if x not in modparams1]), \
+        SharedParamEntries(
+            [x for x in uniqgroups2 if x not in modgroups2],
+            [x for x in uniqparams2 if x not in modparams2]), \
+        SharedParamEntries(modgroups, modparams)
+
+
+def _pack_entries(spentries):
+    # flatten entries into one string that is cheap to send between
+    # processes. params keep the description of their resolved group
+    rows = []
+    for spg in spentries.groups:
+        rows.append('\x1f'.join(['GROUP', str(spg.lineno),
+                                  spg.guid, spg.desc]))
+    for sp in spentries.params:
+        fields = ['PARAM', str(sp.lineno), sp.guid, sp.name, sp.datatype,
+                  sp.datacategory, getattr(sp.group, 'guid', sp.group),
+                  sp.visible, sp.desc, sp.usermod]
+        if isinstance(sp.group, SharedParamGroup):
+            fields.append(sp.group.desc)
+        rows.append('\x1f'.join(fields))
+    return '\x1e'.join(rows)
+
+
+def _unpack_entries(packed):
+    spgroups = []
+    sparams = []
+    group_lut = {}
+    for row in packed.split('\x1e') if packed else []:
+        fields = row.split('\x1f')
+        lineno = int(fields[1]) - 1
+        if fields[0] == 'GROUP':
+            spgroup = SharedParamGroup(fields[2:], lineno=lineno)
+            group_lut[spgroup.key] = spgroup
+            spgroups.append(spgroup)
+        else:
+            sparam = SharedParam(fields[2:10], lineno=lineno)
+            if len(fields) > 10:
+                sparam.group = group_lut.get((sparam.group, fields[10]),
+                                             sparam.group)
+            sparams.append(sparam)
+    return SharedParamEntries(spgroups, sparams)
+
+
+def _merge_files_job(src_files, encoding, cache_settings):
+    # runs in worker processes that do not share module state
+    _cache_settings.update(cache_settings)
+    return _pack_entries(merge(src_files, encoding=encoding))
+
+
+def _iter_merged_entries(src_files, encoding=None, jobs=None):
+    # yield entries of the source files in order. with more than one job,
+    # contiguous chunks of files are merged in a process pool so only the
+    # unique items of each chunk are sent back
+    if not jobs or jobs <= 1 or len(src_files) <= 1:
+        for src_file in src_files:
+            yield read_entries(src_file, encoding=encoding)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = -(-len(src_files) // jobs)
+    chunks = [src_files[x:x + chunksize]
+              for x in range(0, len(src_files), chunksize)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for packed in executor.map(_merge_files_job,
+                                   chunks,
+                                   [encoding] * len(chunks),
+                                   [dict(_cache_settings)] * len(chunks)):
+            yield _unpack_entries(packed)
+
+
+def merge(source_files, out_file=None, encoding=None, jobs=None):
     merged_spgroups = set()
     merged_sparams = set()
-    for sfile in source_files:
-        spgroups, sparams = read_entries(sfile, encoding=encoding)
-        merged_spgroups = merged_spgroups.union(spgroups)
-        merged_sparams = merged_sparams.union(sparams)
+    # digests of the group contents merged so far, per group guid
+    merged_digests = defaultdict(set)
+    for spentries in _iter_merged_entries(source_files,
+                                          encoding=encoding,
+                                          jobs=jobs):
+        # groups identical to an already merged version are skipped
+        digests = _group_digests(spentries)
+        changed = set(k for k, v in digests.items()
+                      if v not in merged_digests[k])
+        if len(changed) < len(digests):
+            spentries = _select_groups(spentries, changed)
+        for groupid in changed:
+            merged_digests[groupid].add(digests[groupid])
+
+        spgroups, sparams = spentries
+        with timed('set operations') as phase:
+            merged_spgroups.update(spgroups)
+            merged_sparams.update(sparams)
+            phase.items = len(spgroups) + len(sparams)
 
     if out_file:
         write_entries(list(merged_spgroups) + list(merged_sparams),
@@ -220,17 +1433,316 @@ def merge(source_files, out_file=None, encoding=None):
         return SharedParamEntries(list(merged_spgroups), list(merged_sparams))
 
 
-def subtract(first_file, source_files, out_file=None, encoding=None):
+def _guid_lut(spitems):
+    # first item of each guid, in file order
+    lut = OrderedDict()
+    for spitem in spitems:
+        lut.setdefault(spitem.guid, spitem)
+    return lut
+
+
+def _item_fields(spitem):
+    # field name and value pairs merged by merge3, group by guid
+    fields = [(x, getattr(spitem, x)) for x in spitem.datafields]
+    if isinstance(spitem, SharedParam):
+        fields.append(('group', getattr(spitem.group, 'guid', spitem.group)))
+    return fields
+
+
+def _merge3_items(base, ours, theirs):
+    # returns merged items by guid and conflicts. field changes made on one
+    # side only are applied, fields changed differently on both sides keep
+    # our value and are reported
+    merged = OrderedDict()
+    conflicts = []
+    for guid in chain(ours, (x for x in theirs if x not in ours)):
+        bitem = base.get(guid)
+        oitem = ours.get(guid)
+        titem = theirs.get(guid)
+        if titem is None or oitem is None:
+            # removed on one side, or added on the other
+            kept = oitem or titem
+            if bitem is None:
+                merged[guid] = kept
+            elif _item_fields(kept) != _item_fields(bitem):
+                conflicts.append(SharedParamConflict(bitem, oitem, titem, []))
+                merged[guid] = kept
+            continue
+
+        ofields = _item_fields(oitem)
+        tfields = _item_fields(titem)
+        if ofields == tfields:
+            merged[guid] = oitem
+            continue
+        bfields = dict(_item_fields(bitem)) if bitem is not None else {}
+
+        values = []
+        conflictfields = []
+        for (field, ovalue), (_, tvalue) in zip(ofields, tfields):
+            bvalue = bfields.get(field)
+            if ovalue != tvalue and ovalue != bvalue and tvalue != bvalue:
+                conflictfields.append(field)
+                values.append(ovalue)
+            else:
+                values.append(tvalue if ovalue == bvalue else ovalue)
+        if conflictfields:
+            conflicts.append(
+                SharedParamConflict(bitem, oitem, titem, conflictfields)
+                )
+
+        if isinstance(oitem, SharedParam):
+            name, datatype, datacategory, visible, desc, usermod, group = \
+                values
+            mitem = SharedParam([guid, name, datatype, datacategory, group,
+                                 visible, desc, usermod],
+                                lineno=oitem.lineno - 1)
+        else:
+            mitem = SharedParamGroup([guid] + values,
+                                     lineno=oitem.lineno - 1)
+        merged[guid] = mitem
+    return merged, conflicts
+
+
+def merge3(base_file, ours_file, theirs_file, out_file=None, encoding=None):
+    """Merge changes made to base file in ours and theirs by guid.
+
+    Groups and params added, removed or changed on one side only are
+    applied. Fields changed to different values on both sides, and items
+    changed on one side but removed on the other, keep our version (or
+    the changed version) and are reported as SharedParamConflict. Items
+    are matched by guid, so each file is read once and merged in linear
+    time. Returns the merged entries and the conflicts as a tuple of two
+    SharedParamEntries, writing the merged entries to out_file if given.
+    """
+    base, ours, theirs = [read_entries(x, encoding=encoding)
+                          for x in (base_file, ours_file, theirs_file)]
+
+    with timed('merge3') as phase:
+        mgroups, groupconflicts = _merge3_items(_guid_lut(base.groups),
+                                                _guid_lut(ours.groups),
+                                                _guid_lut(theirs.groups))
+        mparams, paramconflicts = _merge3_items(_guid_lut(base.params),
+                                                _guid_lut(ours.params),
+                                                _guid_lut(theirs.params))
+
+        # resolve groups of merged params, keeping groups that were
+        # removed on one side but are still used on the other
+        group_luts = [_guid_lut(x.groups) for x in (ours, theirs, base)]
+        for sparam in mparams.values():
+            groupid = getattr(sparam.group, 'guid', sparam.group)
+            if groupid not in mgroups:
+                for group_lut in group_luts:
+                    if groupid in group_lut:
+                        mgroups[groupid] = group_lut[groupid]
+                        break
+            sparam.group = mgroups.get(groupid, groupid)
+        phase.items = len(mgroups) + len(mparams)
+
+    merged = SharedParamEntries(list(mgroups.values()),
+                                list(mparams.values()))
+    if out_file:
+        write_entries(merged, out_file, encoding=encoding)
+    return merged, SharedParamEntries(groupconflicts, paramconflicts)
+
+
+def subtract(first_file, source_files, out_file=None, encoding=None,
+             jobs=None):
     spgroups, sparams = read_entries(first_file, encoding=encoding)
     subtracted_spgroups = set(spgroups)
     subtracted_sparams = set(sparams)
-    for sfile in source_files:
-        spgroups, sparams = read_entries(sfile, encoding=encoding)
-        subtracted_spgroups = subtracted_spgroups.difference(spgroups)
-        subtracted_sparams = subtracted_sparams.difference(sparams)
+    for spgroups, sparams in _iter_merged_entries(source_files,
+                                                  encoding=encoding,
+                                                  jobs=jobs):
+        with timed('set operations') as phase:
+            subtracted_spgroups.difference_update(spgroups)
+            subtracted_sparams.difference_update(sparams)
+            phase.items = len(spgroups) + len(sparams)
 
     if out_file:
         write_entries(list(subtracted_spgroups) + list(subtracted_sparams),
                       out_file, encoding=encoding)
     else:
         return SharedParamEntries(subtracted_spgroups, subtracted_sparams)
+
+
+def _read_manifest(manifest_file, encoding=None):
+    # set of lower case guids, first field of each line of manifest file
+    with timed('read manifest') as phase:
+        with open(manifest_file, 'rb') as mf:
+            data = mf.read()
+        text = data.decode(_detect_encoding(data, encoding)).lower()
+        lines = text.splitlines()
+        # only lines of manifests with extra fields need splitting
+        if '\t' in text or ',' in text or ';' in text:
+            lines = (re.split(r'[\t,;]', x, maxsplit=1)[0] for x in lines)
+        guids = set(x.strip() for x in lines)
+        guids = set(x for x in guids if x and not x.startswith('#'))
+        phase.items = len(guids)
+    return guids
+
+
+def purge(src_file, manifest, out_file=None, encoding=None):
+    """Drop params whose guid is not in the usage manifest.
+
+    manifest is a file listing one used guid per line (extra tab or comma
+    separated fields are ignored), or an iterable of used guids. Guids
+    are compared case-insensitively. Groups left without params are
+    dropped as well.
+    """
+    # file paths are strings, guids are given in any other iterable
+    if hasattr(manifest, 'lower'):
+        usedguids = _read_manifest(manifest, encoding=encoding)
+    else:
+        usedguids = set(x.lower() for x in manifest)
+
+    spgroups = []
+    sparams = []
+    usedgroups = set()
+    with timed('purge') as phase:
+        for spitem in iter_entries(src_file, encoding=encoding):
+            if isinstance(spitem, SharedParamGroup):
+                spgroups.append(spitem)
+            elif spitem.guid.lower() in usedguids:
+                sparams.append(spitem)
+                usedgroups.add(getattr(spitem.group, 'guid', spitem.group))
+            phase.items += 1
+        _resolve_late_groups(sparams, spgroups)
+        spgroups = [x for x in spgroups if x.guid in usedgroups]
+
+    if out_file:
+        write_entries(SharedParamEntries(spgroups, sparams),
+                      out_file, encoding=encoding)
+    else:
+        return SharedParamEntries(spgroups, sparams)
+
+
+def _check_rows(rows):
+    # yield issues of raw rows, params are checked against groups once all
+    # rows are read since groups may follow their params
+    guidpattern = re.compile(r'^[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}'
+                             r'-[0-9a-fA-F]{12}$')
+    groupids = set()
+    groupparams = []
+    for count, line in rows:
+        lineno = count + 1
+        if line[0] == 'GROUP':
+            if len(line) - 1 < GROUP_FIELDS:
+                yield SharedParamIssue(
+                    lineno, 'short-row',
+                    'GROUP row has {} of {} fields'
+                    .format(len(line) - 1, GROUP_FIELDS))
+                continue
+            if not line[1].isdigit():
+                yield SharedParamIssue(
+                    lineno, 'bad-group-id',
+                    'group id "{}" is not a number'.format(line[1]))
+            groupids.add(line[1])
+            continue
+
+        if len(line) - 1 < PARAM_FIELDS:
+            yield SharedParamIssue(
+                lineno, 'short-row',
+                'PARAM row has {} of {} fields'
+                .format(len(line) - 1, PARAM_FIELDS))
+            continue
+        guid, name, datatype = line[1:4]
+        if not guidpattern.match(guid):
+            yield SharedParamIssue(
+                lineno, 'bad-guid',
+                'param "{}" has malformed guid "{}"'.format(name, guid))
+        if datatype not in DATATYPES \
+                and not datatype.startswith(DATATYPE_PREFIXES):
+            yield SharedParamIssue(
+                lineno, 'unknown-datatype',
+                'param "{}" has unknown datatype "{}"'.format(name, datatype))
+        for field, value in (('visible', line[6]), ('usermod', line[8])):
+            if value not in ('0', '1'):
+                yield SharedParamIssue(
+                    lineno, 'bad-flag',
+                    'param "{}" has {} "{}" instead of 0 or 1'
+                    .format(name, field, value))
+        groupparams.append((lineno, name, line[5]))
+
+    for lineno, name, groupid in groupparams:
+        if groupid not in groupids:
+            yield SharedParamIssue(
+                lineno, 'orphan-param',
+                'param "{}" refers to missing group "{}"'
+                .format(name, groupid))
+
+
+def check(src_file, encoding=None):
+    """Check structure of shared param file in a single pass over its rows.
+
+    Returns a list of SharedParamIssue sorted by line number. Rules are:
+    short-row (rows with missing fields), bad-guid, bad-group-id,
+    unknown-datatype (see DATATYPES), bad-flag (visible and user
+    modifiable other than 0 or 1) and orphan-param (params referring to
+    a group id that is not in the file). Issues of WARNING_RULES are
+    only warnings.
+    """
+    with timed('check'):
+        return sorted(_check_rows(_read_rows(src_file, encoding)))
+
+
+def _scan_file_job(src_file, encoding, cache_settings):
+    # runs in worker processes that do not share module state. returns
+    # guid, name, datatype and line number of params packed in a string
+    _cache_settings.update(cache_settings)
+    try:
+        rows = _read_rows(src_file, encoding)
+        return src_file, '\x1e'.join(
+            '\x1f'.join((line[1], line[2], line[3], str(count + 1)))
+            for count, line in rows if line[0] == 'PARAM'
+            ), None
+    except Exception as scan_err:
+        return src_file, None, str(scan_err)
+
+
+def scan(src_dir, encoding=None, pattern='*.txt', jobs=None):
+    """Index param guids of all shared param files under src_dir.
+
+    Files matching pattern are read in a process pool when jobs is more
+    than 1. Files are read through the parse cache when it is enabled, so
+    unchanged files are not parsed again. Returns a SharedParamScan of
+    guid to SharedParamRef lists for all params, the guids used with more
+    than one name or datatype, and (file, error) of unreadable files.
+    """
+    src_files = []
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        dirnames.sort()
+        for filename in sorted(fnmatch.filter(filenames, pattern)):
+            src_files.append(os.path.join(dirpath, filename))
+
+    cache_settings = dict(_cache_settings)
+    if jobs and jobs > 1 and len(src_files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_scan_file_job,
+                                        src_files,
+                                        [encoding] * len(src_files),
+                                        [cache_settings] * len(src_files)))
+    else:
+        results = [_scan_file_job(x, encoding, cache_settings)
+                   for x in src_files]
+
+    index = OrderedDict()
+    errors = []
+    with timed('index') as phase:
+        for src_file, packed, scan_err in results:
+            if scan_err:
+                errors.append((src_file, scan_err))
+                continue
+            for row in packed.split('\x1e') if packed else []:
+                guid, name, datatype, lineno = row.split('\x1f')
+                index.setdefault(guid, []).append(
+                    SharedParamRef(src_file, int(lineno), name, datatype)
+                    )
+                phase.items += 1
+
+    conflicts = OrderedDict(
+        (k, v) for k, v in index.items()
+        if len({(x.name, x.datatype) for x in v}) > 1
+        )
+    return SharedParamScan(index, conflicts, errors)
+
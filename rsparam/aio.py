@@ -0,0 +1,122 @@
+"""Asyncio wrappers running rsparam functions in an executor.
+
+Reading and parsing files blocks, so each coroutine hands the call to
+the executor set with set_executor(), or to the default thread pool of
+the event loop. Results of process pool executors are pickled back to
+the event loop process.
+"""
+
+import asyncio
+import functools
+
+import rsparam
+
+
+# max number of files processed at once by the batch helpers
+DEFAULT_LIMIT = 4
+
+# executor running the blocking calls, see set_executor()
+_executor_settings = {}
+
+
+def set_executor(executor):
+    """Set executor running the blocking calls.
+
+    executor is e.g. a ThreadPoolExecutor or ProcessPoolExecutor, or None
+    to use the default executor of the event loop.
+    """
+    _executor_settings['executor'] = executor
+
+
+def get_executor():
+    return _executor_settings.get('executor')
+
+
+def _call(funcname, cache_settings, args, kwargs):
+    # runs in the executor. worker processes do not share module state,
+    # so the parse cache settings are passed along
+    if cache_settings:
+        rsparam._cache_settings.update(cache_settings)
+    return getattr(rsparam, funcname)(*args, **kwargs)
+
+
+async def _run(funcname, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(_call, funcname,
+                          dict(rsparam._cache_settings), args, kwargs)
+        )
+
+
+async def aread_entries(src_file, encoding=None,
+                        dupl_groups=rsparam.DUPL_GROUP_FIRST, columnar=False):
+    return await _run('read_entries', src_file, encoding=encoding,
+                      dupl_groups=dupl_groups, columnar=columnar)
+
+
+async def aget_paramgroups(src_file, encoding=None):
+    return await _run('get_paramgroups', src_file, encoding=encoding)
+
+
+async def aget_params(src_file, encoding=None, groupid=None):
+    return await _run('get_params', src_file, encoding=encoding,
+                      groupid=groupid)
+
+
+async def afind_duplicates(src_file, encoding=None, byname=False):
+    return await _run('find_duplicates', src_file, encoding=encoding,
+                      byname=byname)
+
+
+async def afind_similar(src_file, threshold=0.8, encoding=None):
+    return await _run('find_similar', src_file, threshold=threshold,
+                      encoding=encoding)
+
+
+async def afind(src_file, searchstr, encoding=None, fields=None):
+    return await _run('find', src_file, searchstr, encoding=encoding,
+                      fields=fields)
+
+
+async def afind_batch(src_file, searchstrs, encoding=None, fields=None):
+    return await _run('find_batch', src_file, searchstrs,
+                      encoding=encoding, fields=fields)
+
+
+async def acompare(first_file, second_file, encoding=None, modified=False):
+    return await _run('compare', first_file, second_file,
+                      encoding=encoding, modified=modified)
+
+
+async def acheck(src_file, encoding=None):
+    return await _run('check', src_file, encoding=encoding)
+
+
+async def adigest(src_file, encoding=None):
+    return await _run('digest', src_file, encoding=encoding)
+
+
+async def amap(afunc, src_files, limit=DEFAULT_LIMIT, **kwargs):
+    """Await afunc(src_file, **kwargs) for each of src_files.
+
+    At most limit files are processed at once. Returns the results in
+    the order of src_files.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run_limited(src_file):
+        async with semaphore:
+            return await afunc(src_file, **kwargs)
+
+    return await asyncio.gather(*[run_limited(x) for x in src_files])
+
+
+async def aread_many(src_files, encoding=None, limit=DEFAULT_LIMIT):
+    """Read entries of many files, at most limit files at once.
+
+    Returns a dict of src_file to SharedParamEntries.
+    """
+    results = await amap(aread_entries, src_files, limit=limit,
+                         encoding=encoding)
+    return dict(zip(src_files, results))
@@ -6,14 +6,23 @@ Usage:
     rsparam (-h | --help)
     rsparam (-V | --version)
     rsparam (-W | --writerversion)
-    rsparam [-q -e <encod>] list [-a -s <sort_by> -c <columns> -o <out_file>] <src_file>
-    rsparam [-q -e <encod>] list [-p -g -s <sort_by> -c <columns> -o <out_file>] <src_file>
-    rsparam [-q -e <encod>] list -p [-f <guid> -o <out_file>] <src_file>
-    rsparam [-q -e <encod>] find dupl [-n -a -p -g -s <sort_by> -c <columns> -o <out_file>] <src_file>
-    rsparam [-q -e <encod>] find <regex_pattern> [-p -g -s <sort_by> -c <columns> -o <out_file>] <src_file>
-    rsparam [-q -e <encod>] comp [-p -g -1 -2 -s <sort_by> -c <columns> -O] <first_file> <second_file>
-    rsparam [-q -e <encod>] merge [-o <out_file>] <src_files>...
-    rsparam [-q -e <encod>] subtract [-o <out_file>] <first_file> <src_files>...
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] list [-a -s <sort_by> -c <columns> --format <format> -o <out_file>] <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] list [-p -g -s <sort_by> -c <columns> --format <format> -o <out_file>] <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] list -p [-f <guid> -c <columns> --format <format> -o <out_file>] <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] find dupl [-n -a -p -g --fuzzy <threshold> -s <sort_by> -c <columns> --format <format> -o <out_file>] <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] find batch [-p -g -i <fields> -P <patterns_file> -c <columns> --format <format> -o <out_file>] <src_file> [<regex_patterns>...]
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] find <regex_pattern> [-p -g -i <fields> -s <sort_by> -c <columns> --format <format> -o <out_file>] <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] comp [-p -g -1 -2 -s <sort_by> -c <columns> --format <format> -O] <first_file> <second_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] digest [-g --format <format>] <src_files>...
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] check [--format <format>] <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] scan [-j <jobs> -m <pattern> --format <format>] <src_dir>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] export --sqlite <db_file> <src_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] import --sqlite <db_file> [-o <out_file>]
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] serve [--host <host> --port <port> --root <root_dir>...]
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] merge [-o <out_file> -j <jobs>] <src_files>...
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] merge3 [-o <out_file>] <base_file> <ours_file> <theirs_file>
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] subtract [-o <out_file> -j <jobs>] <first_file> <src_files>...
+    rsparam [-q -t -e <encod> --no-cache --profile <prof_file>] purge [-o <out_file>] <src_file> <manifest_file>
 
 Options:
     -h, --help                          Show this help
@@ -21,66 +30,174 @@ Options:
     -W, --writerversion                 Show shared param file version
     -q, --quiet                         Quiet mode [default: False]
     -e <encod>, --encode <encod>        File encoding [default: utf-8]
+    --no-cache                          Do not use the parse cache
+    -t, --timings                       Print phase timings and peak memory
+    --profile <prof_file>               Write cProfile stats to file
     -a, --all                           All items
     -p, --params                        Parameters only
     -g, --groups                        Parameter groups only
     -s <sort_by>, --sortby <sort_by>    Sort by "name", "group" [default: name]
     -c <columns>, --columns <columns>   List of data columns separated by :
+    --format <format>                   Output format: table, tsv, csv, jsonl [default: table]
     -f <guid>, --filter <guid>          Filter by group guid
-    -o <out_file>, --output <out_file>  Write results to output file
+    -i <fields>, --in <fields>          Search only in fields separated by :
+    -P <patterns_file>, --patterns <patterns_file>
+                                        File of regex patterns, one per line
+    -o <out_file>, --output <out_file>  Write results to file (- for stdout)
     -O, --OUTPUT                        Write complex results to output file(s)
     -n, --byname                        Compare by name instead of guid
+    --fuzzy <threshold>                 Find similar names, similarity over 0 up to 1
     -1, --first                         Output results for first file only
     -2, --second                        Output results for second file only
+    -j <jobs>, --jobs <jobs>            Files to read in parallel [default: 1]
+    -m <pattern>, --match <pattern>     Scanned file name pattern [default: *.txt]
+    --sqlite <db_file>                  SQLite database file
+    --host <host>                       Server address [default: 127.0.0.1]
+    --port <port>                       Server port [default: 8765]
+    --root <root_dir>                   Directory of served files [default: .]
 """ # noqa
 
 
-from docopt import docopt
-import colorful
-from tabulate import tabulate
+import os
+import re
+import sys
+import csv
+import json
+import time
+import codecs
+import locale
 
 import rsparam
 
 
-# process command line args
-args = docopt(__doc__, version='rsparam {}'.format(rsparam.__version__))
+# command line args, parsed in main()
+args = {}
 
+# formats of listed items, all but table are printed without measuring
+# column widths first. list and find print these as the file is read
+OUTPUT_FORMATS = ('table', 'tsv', 'csv', 'jsonl')
 
-def report(message):
+# columns of the header already printed to a tsv or csv stream
+_stream_state = {'columns': None}
+
+
+def colorize(message, color):
+    # colorful is only imported when output is colored
+    import colorful
+    return getattr(colorful, color)(message)
+
+
+def tabulate(tabular_data, headers=()):
+    # tabulate is only imported when a table is printed
+    from tabulate import tabulate as tabulate_data
+    with rsparam.timed('render') as phase:
+        phase.items = len(tabular_data)
+        return tabulate_data(tabular_data, headers=headers)
+
+
+def peak_memory():
+    # peak resident memory of process in bytes, None if not available
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macos and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def report_timings(elapsed):
+    # timings go to stderr to keep results output clean
+    lines = ['', '{:<16} {:>10} {:>10}'.format('phase', 'seconds', 'items')]
+    for phase, seconds, items in rsparam.get_timings():
+        lines.append('{:<16} {:>10.4f} {:>10}'.format(phase, seconds, items))
+    lines.append('{:<16} {:>10.4f}'.format('total', elapsed))
+    peak = peak_memory()
+    lines.append('peak memory: {}'.format(
+        '{:.1f} MB'.format(peak / 1048576.0) if peak else 'n/a'
+        ))
+    sys.stderr.write('\n'.join(lines) + '\n')
+
+
+def report(message, color=None):
     if not args['--quiet']:
-        print(message)
+        print(colorize(message, color) if color else message)
 
 
 def report_globals():
     enc_report = 'encoding={}'.format(args['--encode']) if args['--encode'] \
         else 'encoding not set'
-    report(colorful.yellow(enc_report))
+    report(enc_report, color='yellow')
 
 
 def report_filenames(sparam_files,
                      title='source file: ',
-                     colorfunc=colorful.blue):
+                     color='blue'):
     if not isinstance(sparam_files, list):
         sparam_files = [sparam_files]
     for sparam_file in sparam_files:
-        report(colorfunc(f'{title}{sparam_file}'))
+        report(f'{title}{sparam_file}', color=color)
+
+
+def output_target():
+    # output file path, or stdout when output is -
+    if args['--output'] == '-':
+        return sys.stdout
+    return args['--output']
 
 
 def check_write_results(results):
     # write output to file if requested
     if args['--output']:
-        rsparam.write_entries(results, args['--output'],
+        rsparam.write_entries(results, output_target(),
                               encoding=args['--encode'])
         return args['--output']
 
 
-def list_params(src_file, sparams=None):
-    if not sparams:
-        sparams = rsparam.get_params(
-            src_file,
-            encoding=args['--encode'],
-            groupid=args['--filter']
-        )
+def print_rows(rows, headers, columns, section=()):
+    # print rows as a table, or stream them as tsv, csv or jsonl lines
+    out_format = args['--format']
+    if out_format == 'table':
+        rows = list(rows)
+        print(tabulate(rows, headers=headers))
+        return len(rows)
+
+    # streamed rows of multi-section output lead with (column, value) pairs
+    # naming their section, since there are no titles between sections
+    if section:
+        leading = tuple(x[1] for x in section)
+        columns = [x[0] for x in section] + list(columns)
+        rows = (leading + tuple(row) for row in rows)
+
+    count = 0
+    if out_format == 'jsonl':
+        for row in rows:
+            sys.stdout.write(json.dumps(
+                {k: v if v is None or isinstance(v, int) else str(v)
+                 for k, v in zip(columns, row)}
+                ) + '\n')
+            count += 1
+    else:
+        rowwriter = csv.writer(sys.stdout,
+                               delimiter='\t' if out_format == 'tsv' else ',',
+                               lineterminator='\n')
+        # all sections share a single header row
+        if _stream_state['columns'] is None:
+            _stream_state['columns'] = columns
+            rowwriter.writerow(columns)
+        elif _stream_state['columns'] != columns:
+            sys.exit('sections with different columns can not be printed '
+                     'as {}'.format(out_format))
+        for row in rows:
+            rowwriter.writerow(['' if x is None else x for x in row])
+            count += 1
+    return count
+
+
+def list_params(spfile, sparams=None, section=()):
+    if sparams is None:
+        # params are printed while the file is read
+        sparams = spfile.stream_params(groupid=args['--filter'])
 
     # write output to file if requested
     out_file = check_write_results(sparams)
@@ -88,28 +205,26 @@ def list_params(src_file, sparams=None):
         report_filenames(out_file, title='wrote results to: ')
         return
 
-    sparamdata = []
     if args['--columns']:
         sparamattrs = args['--columns'].split(':')
+        headers = sparamattrs
     else:
         sparamattrs = ['guid', 'name', 'datatype', 'group', 'lineno']
-    for sp in sparams:
-        spcolumns = []
-        for spattr in sparamattrs:
-            spcolumns.append(getattr(sp, spattr, None))
-        sparamdata.append(tuple(spcolumns))
+        headers = ('Guid', 'Name', 'Datatype', 'Group', 'Line #')
 
     if args['--sortby'] == 'group':
-        sparamdata = sorted(sparamdata, key=lambda x: getattr(x, 'name', 0))
+        sparams = sorted(sparams, key=lambda x: str(x.group))
 
-    print(tabulate(sparamdata,
-                   headers=('Guid', 'Name', 'Datatype', 'Group', 'Line #')))
-    report("Total of {} items.".format(len(sparamdata)))
+    # rows are produced as they are printed
+    sparamdata = (tuple(getattr(sp, x, None) for x in sparamattrs)
+                  for sp in sparams)
+    count = print_rows(sparamdata, headers, sparamattrs, section=section)
+    report("Total of {} items.".format(count))
 
 
-def list_groups(src_file, spgroups=None):
-    if not spgroups:
-        spgroups = rsparam.get_paramgroups(src_file, encoding=args['--encode'])
+def list_groups(spfile, spgroups=None, section=()):
+    if spgroups is None:
+        spgroups = spfile.get_paramgroups()
 
     # write output to file if requested
     out_file = check_write_results(spgroups)
@@ -117,90 +232,152 @@ def list_groups(src_file, spgroups=None):
         report_filenames(out_file, title='wrote results to: ')
         return
 
-    spgroupdata = []
     if args['--columns']:
         sgroupattrs = args['--columns'].split(':')
+        headers = sgroupattrs
     else:
         sgroupattrs = ['guid', 'name', 'lineno']
-    for spg in spgroups:
-        spgcolumns = []
-        for spgattr in sgroupattrs:
-            spgcolumns.append(getattr(spg, spgattr, None))
-        spgroupdata.append(tuple(spgcolumns))
+        headers = ('Id', 'Description', 'Line #')
 
-    print(tabulate(spgroupdata, headers=('Id', 'Description', 'Line #')))
-    report("Total of {} items.".format(len(spgroupdata)))
+    spgroupdata = (tuple(getattr(spg, x, None) for x in sgroupattrs)
+                   for spg in spgroups)
+    count = print_rows(spgroupdata, headers, sgroupattrs, section=section)
+    report("Total of {} items.".format(count))
 
 
-def list_all(src_file):
-    list_groups(src_file)
-    list_params(src_file)
+def list_all(spfile):
+    list_groups(spfile, section=[('section', 'groups')])
+    list_params(spfile, section=[('section', 'params')])
 
 
-def find_param_dupls(src_file):
-    byname = args['--byname']
-    spentries = rsparam.find_duplicates(src_file, byname=byname)
+def print_dupls(dupllists, byname, headers, columns, rowfunc, section=()):
+    duplparam = 'name' if byname else 'guid'
+    if args['--fuzzy']:
+        duplparam = 'similar name'
+    # streamed formats print all duplicates as one list of rows
+    # similar names are told apart by their cluster number
+    if args['--format'] != 'table':
+        if args['--fuzzy']:
+            print_rows(((idx,) + rowfunc(d)
+                        for idx, dlist in enumerate(dupllists)
+                        for d in dlist),
+                       ('Cluster',) + tuple(headers), ['cluster'] + columns,
+                       section=section)
+            return
+        print_rows((rowfunc(d) for dlist in dupllists for d in dlist),
+                   headers, columns, section=section)
+        return
+
+    for dlist in dupllists:
+        dupldata = [rowfunc(d) for d in dlist]
+        print(colorize('\nduplicates by {}: {}'.format(duplparam,
+                                                       dupldata[0][0]),
+                       'yellow'))
+
+        if args['--sortby'] == 'group' and 'group' in columns:
+            groupidx = columns.index('group')
+            dupldata = sorted(dupldata, key=lambda x: str(x[groupidx]))
+
+        print_rows(dupldata, headers, columns)
+
+
+def find_dupl_entries(spfile):
+    # clusters of similar names, or lists of items with equal guid or name
+    if args['--fuzzy']:
+        try:
+            threshold = float(args['--fuzzy'])
+        except ValueError:
+            threshold = -1
+        if not 0 < threshold <= 1:
+            sys.exit('fuzzy threshold must be above 0 and at most 1: {}'
+                     .format(args['--fuzzy']))
+        return spfile.find_similar(threshold)
+    return spfile.find_duplicates(byname=args['--byname'])
+
+
+def find_param_dupls(spfile, section=()):
+    byname = args['--byname'] or args['--fuzzy']
+    spentries = find_dupl_entries(spfile)
 
     # write output to file if requested
-    out_file = check_write_results(spentries.params)
+    out_file = check_write_results(
+        [d for dlist in spentries.params for d in dlist]
+        )
     if out_file:
         report_filenames(out_file, title='wrote results to: ')
         return
 
     duplparam = 'name' if byname else 'guid'
-    dupldata = []
-    report(colorful.yellow('\nduplicate params by {}:'.format(duplparam)))
-    for dlist in spentries.params:
-        for d in dlist:
-            dupldata.append((d.name if byname else d.guid,
-                             d.guid if byname else d.name,
-                             d.datatype, d.group, d.lineno))
-        print(colorful.yellow('\nduplicates by {}: {}'.format(duplparam,
-                                                              dupldata[0][0])))
-
-        if args['--sortby'] == 'group':
-            dupldata = sorted(dupldata, key=lambda x: str(x[3]))
-
-        print(tabulate(dupldata,
-                       headers=('Name' if byname else 'Guid',
-                                'Guid' if byname else 'Name',
-                                'Datatype', 'Group', 'Line #')))
-
-
-def find_group_dupls(src_file):
-    byname = args['--byname']
-    spentries = rsparam.find_duplicates(src_file, byname=byname)
+    if args['--fuzzy']:
+        duplparam = 'similar name'
+    report('\nduplicate params by {}:'.format(duplparam), color='yellow')
+    print_dupls(spentries.params, byname,
+                headers=('Name' if byname else 'Guid',
+                         'Guid' if byname else 'Name',
+                         'Datatype', 'Group', 'Line #'),
+                columns=['name' if byname else 'guid',
+                         'guid' if byname else 'name',
+                         'datatype', 'group', 'lineno'],
+                rowfunc=lambda d: (d.name if byname else d.guid,
+                                   d.guid if byname else d.name,
+                                   d.datatype, d.group, d.lineno),
+                section=section)
+
+
+def find_group_dupls(spfile, section=()):
+    byname = args['--byname'] or args['--fuzzy']
+    spentries = find_dupl_entries(spfile)
 
     # write output to file if requested
-    out_file = check_write_results(spentries.groups)
+    out_file = check_write_results(
+        [d for dlist in spentries.groups for d in dlist]
+        )
     if out_file:
         report_filenames(out_file, title='wrote results to: ')
         return
 
     duplparam = 'name' if byname else 'guid'
-    dupldata = []
-    report(colorful.yellow('\nduplicate groups by {}:'.format(duplparam)))
-    for dlist in spentries.groups:
-        for d in dlist:
-            dupldata.append((d.name if byname else d.guid,
-                             d.guid if byname else d.name,
-                             d.lineno))
-        print(colorful.yellow('\nduplicates by {}: {}'.format(duplparam,
-                                                              dupldata[0][0])))
-        print(tabulate(dupldata,
-                       headers=('Name' if byname else 'Guid',
-                                'Guid' if byname else 'Name',
-                                'Line #')))
-
-
-def find_all_dupls(src_file):
-    find_group_dupls(src_file)
-    find_param_dupls(src_file)
-
-
-def find_matching(src_file):
+    if args['--fuzzy']:
+        duplparam = 'similar name'
+    report('\nduplicate groups by {}:'.format(duplparam), color='yellow')
+    print_dupls(spentries.groups, byname,
+                headers=('Name' if byname else 'Guid',
+                         'Guid' if byname else 'Name',
+                         'Line #'),
+                columns=['name' if byname else 'guid',
+                         'guid' if byname else 'name',
+                         'lineno'],
+                rowfunc=lambda d: (d.name if byname else d.guid,
+                                   d.guid if byname else d.name,
+                                   d.lineno),
+                section=section)
+
+
+def find_all_dupls(spfile):
+    find_group_dupls(spfile, section=[('section', 'groups')])
+    find_param_dupls(spfile, section=[('section', 'params')])
+
+
+def find_matching(spfile):
     search_str = args['<regex_pattern>']
-    spentries = rsparam.find(src_file, search_str, encoding=args['--encode'])
+    search_fields = args['--in'].split(':') if args['--in'] else None
+
+    # streamed formats print matching groups, then params as they are read
+    if args['--format'] != 'table' and not args['--output']:
+        pattern = re.compile(search_str)
+        if not args['--params']:
+            list_groups(None,
+                        spgroups=[x for x in spfile.get_paramgroups()
+                                  if x.matches(pattern, fields=search_fields)],
+                        section=[('section', 'groups')])
+        if not args['--groups']:
+            list_params(None,
+                        sparams=(x for x in spfile.stream_params()
+                                 if x.matches(pattern, fields=search_fields)),
+                        section=[('section', 'params')])
+        return
+
+    spentries = spfile.find(search_str, fields=search_fields)
 
     # write output to file if requested
     out_entries = []
@@ -215,37 +392,226 @@ def find_matching(src_file):
         return
 
     if spentries.groups and not args['--params']:
-        report(colorful.yellow('\ngroups matching: {}'.format(search_str)))
-        list_groups(None, spgroups=spentries.groups)
+        report('\ngroups matching: {}'.format(search_str), color='yellow')
+        list_groups(None, spgroups=spentries.groups,
+                    section=[('section', 'groups')])
 
     if spentries.params and not args['--groups']:
-        report(colorful.yellow('\nparams matching: {}'.format(search_str)))
-        list_params(None, sparams=spentries.params)
+        report('\nparams matching: {}'.format(search_str), color='yellow')
+        list_params(None, sparams=spentries.params,
+                    section=[('section', 'params')])
+
+
+def list_changes(spchanges, section=()):
+    # write second file version of changed items if requested
+    out_file = check_write_results([x.second for x in spchanges])
+    if out_file:
+        report_filenames(out_file, title='wrote results to: ')
+        return
+
+    changedata = ((spc.second.guid, spc.second.name, ':'.join(spc.fields),
+                   spc.first.lineno, spc.second.lineno)
+                  for spc in spchanges)
+    count = print_rows(changedata,
+                       ('Guid', 'Name', 'Changed',
+                        'Line # (first)', 'Line # (second)'),
+                       ['guid', 'name', 'fields', 'lineno1', 'lineno2'],
+                       section=section)
+    report("Total of {} items.".format(count))
+
+
+def find_batch_matching(spfile):
+    search_strs = list(args['<regex_patterns>'])
+    if args['--patterns']:
+        with codecs.open(args['--patterns'], 'r', args['--encode']) as pf:
+            search_strs.extend(x.strip('\r\n') for x in pf if x.strip())
+    search_fields = args['--in'].split(':') if args['--in'] else None
+    matches = spfile.find_batch(search_strs, fields=search_fields)
+
+    # write all matching items to output file if requested
+    if args['--output']:
+        out_entries = set()
+        for spentries in matches.values():
+            if not args['--params']:
+                out_entries.update(spentries.groups)
+            if not args['--groups']:
+                out_entries.update(spentries.params)
+        out_file = check_write_results(list(out_entries))
+        report_filenames(out_file, title='wrote results to: ')
+        return
+
+    for search_str, spentries in matches.items():
+        report('\nmatching: {} ({} groups, {} params)'
+               .format(search_str,
+                       len(spentries.groups), len(spentries.params)),
+               color='yellow')
+
+        if spentries.groups and not args['--params']:
+            list_groups(None, spgroups=spentries.groups,
+                        section=[('pattern', search_str),
+                                 ('section', 'groups')])
+
+        if spentries.params and not args['--groups']:
+            list_params(None, sparams=spentries.params,
+                        section=[('pattern', search_str),
+                                 ('section', 'params')])
 
 
 def comp(first_file, second_file):
-    uniq1, uniq2 = rsparam.compare(first_file, second_file,
-                                   encoding=args['--encode'])
+    # report changed items separately only when listing both sides
+    # tsv and csv streams share one header so changes are listed as unique
+    if args['--first'] or args['--second'] \
+            or args['--format'] in ('tsv', 'csv'):
+        uniq1, uniq2 = rsparam.compare(first_file, second_file,
+                                       encoding=args['--encode'])
+        modified = rsparam.SharedParamEntries([], [])
+    else:
+        uniq1, uniq2, modified = rsparam.compare(first_file, second_file,
+                                                 encoding=args['--encode'],
+                                                 modified=True)
     # write output to files if requested
     if uniq1.groups and not args['--params'] and not args['--second']:
-        report(colorful.yellow('\nunique groups in first'))
+        report('\nunique groups in first', color='yellow')
         args['--output'] = 'uniq_groups_1.txt' if args['--OUTPUT'] else None
-        list_groups(None, spgroups=uniq1.groups)
+        list_groups(None, spgroups=uniq1.groups,
+                    section=[('section', 'uniq_groups_1')])
 
     if uniq2.groups and not args['--params'] and not args['--first']:
-        report(colorful.yellow('\nunique groups in second'))
+        report('\nunique groups in second', color='yellow')
         args['--output'] = 'uniq_groups_2.txt' if args['--OUTPUT'] else None
-        list_groups(None, spgroups=uniq2.groups)
+        list_groups(None, spgroups=uniq2.groups,
+                    section=[('section', 'uniq_groups_2')])
 
     if uniq1.params and not args['--groups'] and not args['--second']:
-        report(colorful.yellow('\nunique parameters in first'))
+        report('\nunique parameters in first', color='yellow')
         args['--output'] = 'uniq_params_1.txt' if args['--OUTPUT'] else None
-        list_params(None, sparams=uniq1.params)
+        list_params(None, sparams=uniq1.params,
+                    section=[('section', 'uniq_params_1')])
 
     if uniq2.params and not args['--groups'] and not args['--first']:
-        report(colorful.yellow('\nunique parameters in second'))
+        report('\nunique parameters in second', color='yellow')
         args['--output'] = 'uniq_params_2.txt' if args['--OUTPUT'] else None
-        list_params(None, sparams=uniq2.params)
+        list_params(None, sparams=uniq2.params,
+                    section=[('section', 'uniq_params_2')])
+
+    if modified.groups and not args['--params']:
+        report('\nmodified groups', color='yellow')
+        args['--output'] = 'mod_groups.txt' if args['--OUTPUT'] else None
+        list_changes(modified.groups, section=[('section', 'mod_groups')])
+
+    if modified.params and not args['--groups']:
+        report('\nmodified parameters', color='yellow')
+        args['--output'] = 'mod_params.txt' if args['--OUTPUT'] else None
+        list_changes(modified.params, section=[('section', 'mod_params')])
+
+
+def digest(source_files):
+    # file digests, or digests of each group with -g
+    if args['--groups']:
+        digestdata = ((src_file, groupid, groupdigest)
+                      for src_file in source_files
+                      for groupid, groupdigest in rsparam.digest(
+                          src_file, encoding=args['--encode']
+                          ).groups.items())
+        print_rows(digestdata,
+                   ('File', 'Group', 'Digest'),
+                   ['src_file', 'group', 'digest'])
+        return
+
+    digestdata = ((src_file,
+                   rsparam.digest(src_file, encoding=args['--encode']).digest)
+                  for src_file in source_files)
+    print_rows(digestdata, ('File', 'Digest'), ['src_file', 'digest'])
+
+
+def check(src_file):
+    issues = rsparam.check(src_file, encoding=args['--encode'])
+    if issues or args['--format'] != 'table':
+        issuedata = ((x.lineno, x.rule, x.message) for x in issues)
+        print_rows(issuedata,
+                   ('Line #', 'Rule', 'Message'),
+                   ['lineno', 'rule', 'message'])
+    # warnings alone do not fail the check
+    errors = [x for x in issues if x.rule not in rsparam.WARNING_RULES]
+    report("Total of {} issues.".format(len(issues)),
+           color='red' if errors else 'yellow' if issues else 'green')
+    return 1 if errors else 0
+
+
+def parallel_jobs():
+    # number of files read in parallel by scan, merge and subtract
+    try:
+        jobs = int(args['--jobs'])
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        sys.exit('jobs must be a whole number from 1: {}'
+                 .format(args['--jobs']))
+    return jobs
+
+
+def scan(src_dir):
+    results = rsparam.scan(src_dir,
+                           encoding=args['--encode'],
+                           pattern=args['--match'],
+                           jobs=parallel_jobs())
+
+    for src_file, scan_err in results.errors:
+        report('could not read {}: {}'.format(src_file, scan_err),
+               color='red')
+
+    report('\nguids used with different names or datatypes:',
+           color='yellow')
+    conflictdata = ((guid, ref.name, ref.datatype, ref.src_file, ref.lineno)
+                    for guid, refs in results.conflicts.items()
+                    for ref in refs)
+    print_rows(conflictdata,
+               ('Guid', 'Name', 'Datatype', 'File', 'Line #'),
+               ['guid', 'name', 'datatype', 'src_file', 'lineno'])
+    report("Total of {} conflicting guids out of {} guids."
+           .format(len(results.conflicts), len(results.index)))
+
+
+def export_sqlite(source_file):
+    from rsparam import db
+
+    db_file = args['--sqlite']
+    db.export_sqlite(source_file, db_file, encoding=args['--encode'])
+    report_filenames(db_file, title='wrote results to: ')
+
+
+def import_sqlite(db_file):
+    from rsparam import db
+
+    # reporting
+    dest_file = args['--output']
+    report_filenames(dest_file, title='destination file: ')
+
+    if dest_file:
+        db.import_sqlite(db_file, out_file=output_target(),
+                         encoding=args['--encode'])
+        report_filenames(dest_file, title='wrote results to: ')
+        return
+
+    spentries = db.import_sqlite(db_file)
+    list_groups(None, spgroups=spentries.groups)
+    list_params(None, sparams=spentries.params)
+
+
+def serve():
+    from rsparam import server
+
+    # files are readable by anyone reaching a non loopback address, warned
+    # on stderr even in quiet mode
+    if args['--host'] not in server.LOOPBACK_HOSTS:
+        sys.stderr.write('warning: serving files under {} to other '
+                         'machines on {}\n'
+                         .format(', '.join(args['--root']), args['--host']))
+    report('serving queries on http://{}:{}/ (ctrl+c to stop)'
+           .format(args['--host'], args['--port']), color='yellow')
+    server.serve(host=args['--host'], port=int(args['--port']),
+                 encoding=args['--encode'], quiet=args['--quiet'],
+                 roots=args['--root'])
 
 
 def merge(source_files):
@@ -254,7 +620,9 @@ def merge(source_files):
     report_filenames(dest_file, title='destination file: ')
 
     sparamset = rsparam.merge(source_files,
-                              out_file=dest_file, encoding=args['--encode'])
+                              out_file=output_target(),
+                              encoding=args['--encode'],
+                              jobs=parallel_jobs())
 
     if dest_file:
         report_filenames(dest_file, title='wrote results to: ')
@@ -264,13 +632,58 @@ def merge(source_files):
     list_params(None, sparams=sparamset.params)
 
 
+def list_conflicts(spconflicts):
+    conflictdata = []
+    for spc in spconflicts:
+        spitem = spc.ours or spc.theirs
+        conflictdata.append(
+            (spitem.guid, spitem.name,
+             ':'.join(spc.fields) if spc.fields else
+             'removed in {}'.format('ours' if spc.ours is None else 'theirs'),
+             spc.ours.lineno if spc.ours else None,
+             spc.theirs.lineno if spc.theirs else None)
+            )
+    count = print_rows(conflictdata,
+                       ('Guid', 'Name', 'Conflict',
+                        'Line # (ours)', 'Line # (theirs)'),
+                       ['guid', 'name', 'conflict', 'lineno1', 'lineno2'])
+    report("Total of {} items.".format(count))
+
+
+def merge3(base_file, ours_file, theirs_file):
+    # reporting
+    dest_file = args['--output']
+    report_filenames(dest_file, title='destination file: ')
+
+    sparamset, conflicts = rsparam.merge3(base_file, ours_file, theirs_file,
+                                          out_file=output_target(),
+                                          encoding=args['--encode'])
+
+    if dest_file:
+        report_filenames(dest_file, title='wrote results to: ')
+    else:
+        list_groups(None, spgroups=sparamset.groups)
+        list_params(None, sparams=sparamset.params)
+
+    # conflicts are printed even in quiet mode e.g. as a git merge driver
+    if conflicts.groups:
+        report('\nconflicting groups', color='red')
+        list_conflicts(conflicts.groups)
+    if conflicts.params:
+        report('\nconflicting parameters', color='red')
+        list_conflicts(conflicts.params)
+    return 1 if conflicts.groups or conflicts.params else 0
+
+
 def subtract(first_file, source_files):
     # reporting
     dest_file = args['--output']
     report_filenames(dest_file, title='destination file: ')
 
     sparamset = rsparam.subtract(first_file, source_files,
-                                 out_file=dest_file, encoding=args['--encode'])
+                                 out_file=output_target(),
+                                 encoding=args['--encode'],
+                                 jobs=parallel_jobs())
 
     if dest_file:
         report_filenames(dest_file, title='wrote results to: ')
@@ -280,49 +693,140 @@ def subtract(first_file, source_files):
     list_params(None, sparams=sparamset.params)
 
 
-def purge(source_file):
-    raise NotImplementedError()
+def purge(source_file, manifest_file):
+    # reporting
+    dest_file = args['--output']
+    report_filenames(dest_file, title='destination file: ')
+
+    sparamset = rsparam.purge(source_file, manifest_file,
+                              encoding=args['--encode'])
+    report('kept {} params in {} groups'
+           .format(len(sparamset.params), len(sparamset.groups)),
+           color='yellow')
+
+    if dest_file:
+        rsparam.write_entries(sparamset, output_target(),
+                              encoding=args['--encode'])
+        report_filenames(dest_file, title='wrote results to: ')
+        return
+
+    list_groups(None, spgroups=sparamset.groups)
+    list_params(None, sparams=sparamset.params)
 
 
 def main():
+    global args
+    from docopt import docopt
+
+    # process command line args
+    args = docopt(__doc__, version='rsparam {}'.format(rsparam.__version__))
+
     if args['--writerversion']:
         print('shared parameter writer version: {}.{}'
               .format(*rsparam.__sparamversion__))
         return
 
+    if args['--timings']:
+        rsparam.enable_timings()
+
+    start = time.time()
+    if args['--profile']:
+        import cProfile
+        profiler = cProfile.Profile()
+        status = profiler.runcall(run_command)
+        profiler.dump_stats(args['--profile'])
+    else:
+        try:
+            status = run_command()
+        except BrokenPipeError:
+            # output piped into a command that stopped reading
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+
+    if args['--timings']:
+        report_timings(time.time() - start)
+
+    # non-zero exit status e.g. when check finds issues
+    if status:
+        sys.exit(status)
+
+
+def mixes_columns():
+    # commands listing groups and params print differently shaped rows
+    # unless both use the same requested columns
+    one_kind = bool(args['--params']) != bool(args['--groups'])
+    if args['find'] and args['dupl']:
+        return args['--all']
+    if args['list'] or args['find'] or args['comp']:
+        return not one_kind and not args['--columns']
+    return False
+
+
+def run_command():
+    if args['--format'] not in OUTPUT_FORMATS:
+        sys.exit('unknown output format: {}'.format(args['--format']))
+
+    # tsv and csv streams have a single header row for all sections
+    if args['--format'] in ('tsv', 'csv') and mixes_columns() \
+            and not (args['--output'] or args['--OUTPUT']):
+        sys.exit('groups and params can not be listed together as {}, '
+                 'use {}'.format(args['--format'],
+                                 '-p or -g' if args['dupl']
+                                 else '-p, -g or -c <columns>'))
+
+    _stream_state['columns'] = None
+
+    # writing results or streamed rows to stdout
+    if args['--output'] == '-' or args['--format'] != 'table':
+        args['--quiet'] = True
+
     # report globals
     report_globals()
 
+    # sort written entries using the collation of user locale
+    try:
+        locale.setlocale(locale.LC_ALL, '')
+    except locale.Error:
+        pass
+
+    if not args['--no-cache']:
+        rsparam.enable_cache()
+
+    status = 0
     if args['list']:
         # reporting
         src_file = args['<src_file>']
         report_filenames(src_file)
+        spfile = rsparam.SharedParamFile(src_file, encoding=args['--encode'])
 
         # list groups only
         if args['--groups'] and not args['--params']:
-            list_groups(src_file)
+            list_groups(spfile)
         # list params only
         elif args['--params'] and not args['--groups']:
-            list_params(src_file)
+            list_params(spfile)
         # list everything
         else:
-            list_all(src_file)
+            list_all(spfile)
 
     elif args['find']:
         # reporting
         src_file = args['<src_file>']
         report_filenames(src_file)
+        spfile = rsparam.SharedParamFile(src_file, encoding=args['--encode'])
 
         # report duplicates
-        if args['dupl']:
+        if args['batch']:
+            find_batch_matching(spfile)
+        elif args['dupl']:
             if args['--all']:
-                find_all_dupls(src_file)
+                find_all_dupls(spfile)
             elif args['--params']:
-                find_param_dupls(src_file)
+                find_param_dupls(spfile)
             elif args['--groups']:
-                find_group_dupls(src_file)
+                find_group_dupls(spfile)
         else:
-            find_matching(src_file)
+            find_matching(spfile)
 
     elif args['comp']:
         # reporting
@@ -334,6 +838,50 @@ def main():
         # compare two shared parame files
         comp(first_file, second_file)
 
+    elif args['digest']:
+        # reporting
+        src_files = args['<src_files>']
+        report_filenames(src_files)
+
+        # print order-independent digests of files or groups
+        digest(src_files)
+
+    elif args['check']:
+        # reporting
+        src_file = args['<src_file>']
+        report_filenames(src_file)
+
+        # check structure of shared param file
+        status = check(src_file)
+
+    elif args['scan']:
+        # reporting
+        src_dir = args['<src_dir>']
+        report_filenames(src_dir, title='source directory: ')
+
+        # find guid conflicts across shared param files
+        scan(src_dir)
+
+    elif args['export']:
+        # reporting
+        src_file = args['<src_file>']
+        report_filenames(src_file)
+
+        # write shared param file into database
+        export_sqlite(src_file)
+
+    elif args['import']:
+        # reporting
+        db_file = args['--sqlite']
+        report_filenames(db_file, title='database file: ')
+
+        # rebuild shared param file from database
+        import_sqlite(db_file)
+
+    elif args['serve']:
+        # answer queries over files kept in memory
+        serve()
+
     elif args['merge']:
         # reporting
         src_files = args['<src_files>']
@@ -342,6 +890,18 @@ def main():
         # merge two shared param files
         merge(src_files)
 
+    elif args['merge3']:
+        # reporting
+        base_file = args['<base_file>']
+        report_filenames(base_file, title='base file: ')
+        ours_file = args['<ours_file>']
+        report_filenames(ours_file, title='our file: ')
+        theirs_file = args['<theirs_file>']
+        report_filenames(theirs_file, title='their file: ')
+
+        # merge changes of ours and theirs to base by guid
+        status = merge3(base_file, ours_file, theirs_file)
+
     elif args['subtract']:
         # reporting
         first_file = args['<first_file>']
@@ -356,8 +916,11 @@ def main():
         # reporting
         source_file = args['<src_file>']
         report_filenames(source_file)
+        manifest_file = args['<manifest_file>']
+        report_filenames(manifest_file, title='manifest file: ')
 
-        # sort shared param file
-        purge(source_file)
+        # drop params missing from usage manifest
+        purge(source_file, manifest_file)
 
     report('')
+    return status
@@ -0,0 +1,209 @@
+"""SQLite storage for shared param groups and params."""
+
+import re
+import sqlite3
+from collections import OrderedDict
+
+import rsparam
+
+
+SCHEMA = '''
+DROP TABLE IF EXISTS groups;
+DROP TABLE IF EXISTS params;
+CREATE TABLE groups (
+    guid TEXT NOT NULL,
+    name TEXT NOT NULL,
+    lineno INTEGER
+);
+CREATE TABLE params (
+    guid TEXT NOT NULL,
+    name TEXT NOT NULL,
+    datatype TEXT NOT NULL,
+    datacategory TEXT NOT NULL,
+    groupid TEXT NOT NULL,
+    visible TEXT NOT NULL,
+    desc TEXT NOT NULL,
+    usermod TEXT NOT NULL,
+    lineno INTEGER
+);
+CREATE INDEX groups_guid ON groups (guid);
+CREATE INDEX groups_name ON groups (name);
+CREATE INDEX params_guid ON params (guid);
+CREATE INDEX params_name ON params (name);
+CREATE INDEX params_groupid ON params (groupid);
+CREATE INDEX params_datatype ON params (datatype);
+'''
+
+PARAM_COLUMNS = ('guid', 'name', 'datatype', 'datacategory', 'groupid',
+                 'visible', 'desc', 'usermod', 'lineno')
+
+
+def export_sqlite(src_file, db_file, encoding=None):
+    """Write groups and params of shared param file to SQLite database.
+
+    Existing rsparam tables in the database are replaced.
+    """
+    with sqlite3.connect(db_file) as conn:
+        conn.executescript(SCHEMA)
+        sparams = []
+        for spitem in rsparam.iter_entries(src_file, encoding=encoding):
+            if isinstance(spitem, rsparam.SharedParam):
+                sparams.append(
+                    (spitem.guid, spitem.name, spitem.datatype,
+                     spitem.datacategory,
+                     getattr(spitem.group, 'guid', spitem.group),
+                     spitem.visible, spitem.desc, spitem.usermod,
+                     spitem.lineno)
+                    )
+            else:
+                conn.execute('INSERT INTO groups VALUES (?, ?, ?)',
+                             (spitem.guid, spitem.name, spitem.lineno))
+        conn.executemany('INSERT INTO params VALUES ({})'
+                         .format(', '.join('?' * len(PARAM_COLUMNS))),
+                         sparams)
+    conn.close()
+
+
+def import_sqlite(db_file, out_file=None, encoding=None):
+    """Read groups and params from SQLite database.
+
+    Writes them to out_file as a shared param file when given, otherwise
+    returns them as SharedParamEntries.
+    """
+    spdb = SharedParamDB(db_file)
+    try:
+        spentries = rsparam.SharedParamEntries(spdb.get_paramgroups(),
+                                               spdb.get_params())
+    finally:
+        spdb.close()
+
+    if out_file:
+        rsparam.write_entries(spentries, out_file, encoding=encoding)
+    else:
+        return spentries
+
+
+class SharedParamDB(object):
+    """Shared param groups and params queried from SQLite database."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.create_function('REGEXP', 2, self._regexp)
+        self._patterns = {}
+        self._groups = None
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, self.db_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _regexp(self, searchstr, value):
+        pattern = self._patterns.get(searchstr)
+        if pattern is None:
+            pattern = self._patterns[searchstr] = re.compile(searchstr)
+        return value is not None and pattern.search(value) is not None
+
+    def _make_group(self, row):
+        return rsparam.SharedParamGroup(row[:2], lineno=row[2] - 1)
+
+    def _make_param(self, row):
+        sparam = rsparam.SharedParam(row[:8], lineno=row[8] - 1)
+        sparam.group = self._group_lut().get(sparam.group, sparam.group)
+        return sparam
+
+    def _group_lut(self):
+        # first group of each guid, same as reading the file
+        if self._groups is None:
+            self._groups = {}
+            for spgroup in self.get_paramgroups():
+                self._groups.setdefault(spgroup.guid, spgroup)
+        return self._groups
+
+    def _query_params(self, where='', args=()):
+        cursor = self.conn.execute(
+            'SELECT {} FROM params {} ORDER BY rowid'
+            .format(', '.join(PARAM_COLUMNS), where), args
+            )
+        return [self._make_param(x) for x in cursor]
+
+    def _query_groups(self, where='', args=()):
+        cursor = self.conn.execute(
+            'SELECT guid, name, lineno FROM groups {} ORDER BY rowid'
+            .format(where), args
+            )
+        return [self._make_group(x) for x in cursor]
+
+    def get_paramgroups(self):
+        return self._query_groups()
+
+    def get_params(self, groupid=None):
+        if groupid:
+            return self._query_params('WHERE groupid = ?', (groupid,))
+        return self._query_params()
+
+    def get_param(self, guid):
+        sparams = self._query_params('WHERE guid = ?', (guid,))
+        return sparams[0] if sparams else None
+
+    def find(self, searchstr, fields=None):
+        """Find groups and params with fields matching regex searchstr.
+
+        All fields are searched when fields is None. Params are matched
+        on the name of their group when searching the group field.
+        """
+        groupfields = [x for x in fields or ('guid', 'desc')
+                       if x in ('guid', 'name', 'desc')]
+        groupclauses = ['{} REGEXP ?'.format('guid' if x == 'guid' else 'name')
+                        for x in groupfields]
+        paramclauses = []
+        for field in fields or PARAM_COLUMNS[:-1]:
+            if field in ('group', 'groupid'):
+                paramclauses.append(
+                    'groupid IN (SELECT guid FROM groups WHERE name REGEXP ?)'
+                    )
+            elif field in PARAM_COLUMNS[:-1]:
+                paramclauses.append('{} REGEXP ?'.format(field))
+
+        matchedgroups = []
+        if groupclauses:
+            matchedgroups = self._query_groups(
+                'WHERE ' + ' OR '.join(groupclauses),
+                (searchstr,) * len(groupclauses)
+                )
+        matchedparams = []
+        if paramclauses:
+            matchedparams = self._query_params(
+                'WHERE ' + ' OR '.join(paramclauses),
+                (searchstr,) * len(paramclauses)
+                )
+        return rsparam.SharedParamEntries(matchedgroups, matchedparams)
+
+    def find_duplicates(self, byname=False):
+        duplparam = 'name' if byname else 'guid'
+        duplgroups = self._query_groups(
+            'WHERE {0} IN (SELECT {0} FROM groups GROUP BY {0} '
+            'HAVING COUNT(*) > 1)'.format(duplparam)
+            )
+        duplparams = self._query_params(
+            'WHERE {0} IN (SELECT {0} FROM params GROUP BY {0} '
+            'HAVING COUNT(*) > 1)'.format(duplparam)
+            )
+
+        group_lut = OrderedDict()
+        for spgroup in duplgroups:
+            group_lut.setdefault(getattr(spgroup, duplparam),
+                                 []).append(spgroup)
+        param_lut = OrderedDict()
+        for sparam in duplparams:
+            param_lut.setdefault(getattr(sparam, duplparam),
+                                 []).append(sparam)
+        return rsparam.SharedParamEntries(list(group_lut.values()),
+                                          list(param_lut.values()))
@@ -0,0 +1,179 @@
+"""Local JSON query server keeping parsed shared param files in memory.
+
+Endpoints take their arguments as query string parameters and return JSON:
+
+    /find?file=<src_file>&pattern=<regex_pattern>[&fields=name:desc]
+    /params?file=<src_file>[&group=<guid>]
+    /duplicates?file=<src_file>[&byname=1]
+    /compare?first=<first_file>&second=<second_file>[&modified=1]
+
+Files are read on first request and read again once their size or
+modification time changes. Only files under the served root directories
+can be queried, relative paths are taken from the first root. Requests
+are answered one at a time.
+"""
+
+import os
+import re
+import json
+from urllib.parse import urlsplit, parse_qs
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import rsparam
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# addresses only reachable from this machine
+LOOPBACK_HOSTS = ('127.0.0.1', '::1', 'localhost')
+
+
+class QueryError(Exception):
+    """Request that can not be answered, sent back with status code."""
+
+    def __init__(self, message, status=400):
+        super(QueryError, self).__init__(message)
+        self.status = status
+
+
+def item_data(spitem):
+    """Return dict of group or param fields for JSON output."""
+    if isinstance(spitem, rsparam.SharedParamChange):
+        return {'first': item_data(spitem.first),
+                'second': item_data(spitem.second),
+                'fields': spitem.fields}
+    if isinstance(spitem, list):
+        return [item_data(x) for x in spitem]
+    if isinstance(spitem, rsparam.SharedParam):
+        return {'guid': spitem.guid,
+                'name': spitem.name,
+                'datatype': spitem.datatype,
+                'datacategory': spitem.datacategory,
+                'group': getattr(spitem.group, 'guid', spitem.group),
+                'visible': spitem.visible,
+                'desc': spitem.desc,
+                'usermod': spitem.usermod,
+                'lineno': spitem.lineno}
+    return {'guid': spitem.guid,
+            'name': spitem.name,
+            'lineno': spitem.lineno}
+
+
+def entries_data(spentries):
+    return {'groups': [item_data(x) for x in spentries.groups],
+            'params': [item_data(x) for x in spentries.params]}
+
+
+class SharedParamServer(HTTPServer):
+    """HTTP server answering queries from SharedParamFile sessions."""
+
+    def __init__(self, address, encoding=None, quiet=False, roots=None):
+        HTTPServer.__init__(self, address, SharedParamRequestHandler)
+        self.encoding = encoding
+        self.quiet = quiet
+        # directories whose files can be queried, current one by default
+        self.roots = [os.path.realpath(x) for x in roots or [os.getcwd()]]
+        self._spfiles = {}
+
+    def get_file(self, src_file):
+        """Return session of src_file, dropping it if file changed."""
+        src_file = os.path.realpath(os.path.join(self.roots[0], src_file))
+        if not any(_is_under(x, src_file) for x in self.roots):
+            raise QueryError('file is not under a served root: {}'
+                             .format(src_file), status=403)
+        spfile = self._spfiles.get(src_file)
+        if spfile is None:
+            spfile = self._spfiles[src_file] = \
+                rsparam.SharedParamFile(src_file, encoding=self.encoding)
+        spfile.refresh()
+        return spfile
+
+    def query(self, path, query):
+        if path == '/find':
+            spfile = self.get_file(_arg(query, 'file'))
+            fields = query.get('fields')
+            return entries_data(
+                spfile.find(_arg(query, 'pattern'),
+                            fields=fields[0].split(':') if fields else None)
+                )
+        elif path == '/params':
+            spfile = self.get_file(_arg(query, 'file'))
+            group = query.get('group')
+            return [item_data(x)
+                    for x in spfile.get_params(group[0] if group else None)]
+        elif path == '/duplicates':
+            spfile = self.get_file(_arg(query, 'file'))
+            return entries_data(
+                spfile.find_duplicates(byname=_flag(query, 'byname'))
+                )
+        elif path == '/compare':
+            spfile1 = self.get_file(_arg(query, 'first'))
+            spfile2 = self.get_file(_arg(query, 'second'))
+            results = spfile1.compare(spfile2,
+                                      modified=_flag(query, 'modified'))
+            return dict(zip(('first', 'second', 'modified'),
+                            [entries_data(x) for x in results]))
+        raise QueryError('unknown query: {}'.format(path), status=404)
+
+
+def _is_under(root, path):
+    try:
+        return os.path.commonpath([root, path]) == root
+    except ValueError:
+        # paths on different drives
+        return False
+
+
+def _arg(query, name):
+    if name not in query:
+        raise QueryError('missing query parameter: {}'.format(name))
+    return query[name][0]
+
+
+def _flag(query, name):
+    return query.get(name, ['0'])[0].lower() in ('1', 'true', 'yes')
+
+
+class SharedParamRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, result = 200, self.server.query(url.path,
+                                                    parse_qs(url.query))
+        except QueryError as query_err:
+            status, result = query_err.status, {'error': str(query_err)}
+        except re.error as pattern_err:
+            status, result = 400, {'error': str(pattern_err)}
+        except (IOError, OSError) as file_err:
+            status, result = 404, {'error': str(file_err)}
+        except Exception as query_err:
+            status, result = 500, {'error': str(query_err)}
+
+        body = json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, encoding=None, quiet=False,
+          roots=None):
+    """Answer queries on host and port until interrupted.
+
+    Only files under the roots directories are served, see
+    SharedParamServer.
+    """
+    server = SharedParamServer((host, port), encoding=encoding, quiet=quiet,
+                               roots=roots)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,54 @@
+"""Helpers writing small shared param files for tests."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+HEADER = ('# This is a Revit shared parameter file.\r\n'
+          '# Do not edit manually.\r\n'
+          '*META\tVERSION\tMINVERSION\r\n'
+          'META\t2\t1\r\n'
+          '*GROUP\tID\tNAME\r\n')
+PARAM_HEADER = ('*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\t'
+                'VISIBLE\tDESCRIPTION\tUSERMODIFIABLE\r\n')
+
+
+def param_row(guid, name, group='1', datatype='TEXT', visible='1', desc='',
+              usermod='1', datacategory=''):
+    return [guid, name, datatype, datacategory, group, visible, desc,
+            usermod]
+
+
+def file_text(groups, params):
+    """Text of a shared param file with (id, name) groups and param rows.
+
+    Rows are written as given, so rows may be malformed on purpose.
+    """
+    lines = [HEADER]
+    for group in groups:
+        lines.append('\t'.join(('GROUP',) + tuple(group)) + '\r\n')
+    lines.append(PARAM_HEADER)
+    for param in params:
+        lines.append('\t'.join(['PARAM'] + list(param)) + '\r\n')
+    return ''.join(lines)
+
+
+class SampleFileTestCase(unittest.TestCase):
+    """Test case with a temporary directory for sample files."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def path(self, filename):
+        return os.path.join(self.tempdir, filename)
+
+    def write_file(self, filename, groups, params):
+        src_file = self.path(filename)
+        with open(src_file, 'wb') as spf:
+            spf.write(file_text(groups, params).encode('utf-8'))
+        return src_file
@@ -0,0 +1,64 @@
+import time
+import asyncio
+import threading
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import rsparam
+from rsparam import aio
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+class AioTestCase(SampleFileTestCase):
+    def setUp(self):
+        super(AioTestCase, self).setUp()
+        self.src_files = [
+            self.write_file('{}.txt'.format(idx), [('1', 'Fire')],
+                            [param_row('a{}'.format(idx), 'Param',
+                                       desc=str(idx))])
+            for idx in range(6)
+            ]
+        self.addCleanup(aio.set_executor, aio.get_executor())
+
+    def summary(self, entries_by_file):
+        return {k: [(x.guid, x.desc, x.group.desc) for x in v.params]
+                for k, v in entries_by_file.items()}
+
+
+class ReadManyTests(AioTestCase):
+    def test_limit(self):
+        # calls block in worker threads, at most limit at a time
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0}
+        read_entries = rsparam.read_entries
+
+        def tracked_read(*args, **kwargs):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+            time.sleep(0.05)
+            with lock:
+                running['now'] -= 1
+            return read_entries(*args, **kwargs)
+
+        executor = ThreadPoolExecutor(max_workers=6)
+        self.addCleanup(executor.shutdown)
+        aio.set_executor(executor)
+        with mock.patch('rsparam.read_entries', side_effect=tracked_read):
+            results = asyncio.run(
+                aio.aread_many(self.src_files, encoding='utf-8', limit=2))
+        self.assertEqual(2, running['max'])
+        self.assertEqual(self.src_files, list(results))
+        self.assertEqual([[str(idx)] for idx in range(6)],
+                         [[x.desc for x in results[y].params]
+                          for y in self.src_files])
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            aio.set_executor(executor)
+            results = asyncio.run(
+                aio.aread_many(self.src_files, encoding='utf-8'))
+        self.assertEqual(
+            self.summary({x: rsparam.read_entries(x, encoding='utf-8')
+                          for x in self.src_files}),
+            self.summary(results))
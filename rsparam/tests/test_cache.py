@@ -0,0 +1,102 @@
+import os
+from unittest import mock
+
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2'),
+          param_row('a3', 'Mark', group='2')]
+
+
+class CacheTests(SampleFileTestCase):
+    def setUp(self):
+        super(CacheTests, self).setUp()
+        self.cache_dir = self.path('cache')
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        rsparam.enable_cache(cache_dir=self.cache_dir)
+
+    def tearDown(self):
+        rsparam.disable_cache()
+        super(CacheTests, self).tearDown()
+
+    def cache_files(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return sorted(os.listdir(self.cache_dir))
+
+    def read_guids(self, src_file=None):
+        return [x.guid for x in
+                rsparam.read_entries(src_file or self.src_file).params]
+
+    def test_hit(self):
+        self.assertEqual(['a1', 'a2', 'a3'], self.read_guids())
+        self.assertEqual(1, len(self.cache_files()))
+        cache_file = os.path.join(self.cache_dir, self.cache_files()[0])
+        os.utime(cache_file, (0, 0))
+        with mock.patch('rsparam._read_file_rows',
+                        side_effect=AssertionError):
+            self.assertEqual(['a1', 'a2', 'a3'], self.read_guids())
+        # hits mark the cache file as recently used
+        self.assertGreater(os.path.getmtime(cache_file), 0)
+
+    def test_chunks(self):
+        with mock.patch('rsparam.CACHE_CHUNKSIZE', 2):
+            self.read_guids()
+        with mock.patch('rsparam._read_file_rows',
+                        side_effect=AssertionError):
+            self.assertEqual(['a1', 'a2', 'a3'], self.read_guids())
+
+    def test_miss_after_change(self):
+        self.read_guids()
+        self.write_file('src.txt', GROUPS, PARAMS[:2])
+        self.assertEqual(['a1', 'a2'], self.read_guids())
+        self.assertEqual(2, len(self.cache_files()))
+
+        # same size, later modification time
+        src_stat = os.stat(self.src_file)
+        os.utime(self.src_file, (src_stat.st_atime, src_stat.st_mtime + 10))
+        self.read_guids()
+        self.assertEqual(3, len(self.cache_files()))
+
+    def test_broken_cache_file(self):
+        self.read_guids()
+        cache_file = os.path.join(self.cache_dir, self.cache_files()[0])
+        with open(cache_file, 'r+b') as cf:
+            cf.truncate(os.path.getsize(cache_file) // 2)
+        self.assertEqual(['a1', 'a2', 'a3'], self.read_guids())
+        # the cache file is written again
+        with mock.patch('rsparam._read_file_rows',
+                        side_effect=AssertionError):
+            self.assertEqual(['a1', 'a2', 'a3'], self.read_guids())
+
+    def test_partial_read_not_cached(self):
+        spitems = rsparam.iter_entries(self.src_file)
+        next(spitems)
+        spitems.close()
+        self.assertEqual([], self.cache_files())
+
+    def test_disabled(self):
+        rsparam.disable_cache()
+        self.read_guids()
+        self.assertEqual([], self.cache_files())
+
+    def test_eviction(self):
+        src_files = [self.write_file('src{}.txt'.format(x), GROUPS, PARAMS)
+                     for x in range(3)]
+        self.read_guids(src_files[0])
+        cache_size = os.path.getsize(
+            os.path.join(self.cache_dir, self.cache_files()[0]))
+        first_cache = self.cache_files()
+        # room for two cache files
+        rsparam.enable_cache(cache_dir=self.cache_dir,
+                             maxsize=cache_size * 2)
+        for idx, src_file in enumerate(src_files[1:]):
+            # cache files are ordered by modification time
+            cache_file = os.path.join(self.cache_dir, first_cache[0])
+            os.utime(cache_file, (0, idx))
+            self.read_guids(src_file)
+        self.assertEqual(2, len(self.cache_files()))
+        self.assertNotIn(first_cache[0], self.cache_files())
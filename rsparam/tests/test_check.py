@@ -0,0 +1,44 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GUID1 = '0b3c8f1e-2a4d-4e6f-8a9b-1c2d3e4f5a6b'
+GUID2 = '1c4d9a2f-3b5e-4f7a-9b0c-2d3e4f5a6b7c'
+
+
+class CheckTests(SampleFileTestCase):
+    def rules(self, groups, params):
+        src_file = self.write_file('src.txt', groups, params)
+        return [(x.lineno, x.rule) for x in rsparam.check(src_file)]
+
+    def test_valid_file(self):
+        self.assertEqual(
+            self.rules([('1', 'Loads')],
+                       [param_row(GUID1, 'Axial', datatype='FORCE'),
+                        param_row(GUID2, 'Class',
+                                  datatype='LOADCLASSIFICATION')]),
+            [])
+
+    def test_structural_datatypes(self):
+        for datatype in ('FORCE', 'LINEAR_FORCE', 'AREA_FORCE', 'MOMENT',
+                         'LOAD_CLASSIFICATION', 'STRUCTURAL_FORCE',
+                         'HVAC_AIRFLOW'):
+            self.assertEqual(
+                self.rules([('1', 'Loads')],
+                           [param_row(GUID1, 'P', datatype=datatype)]),
+                [], datatype)
+
+    def test_issues(self):
+        self.assertEqual(
+            self.rules([('1', 'Loads'), ('x', 'Bad')],
+                       [param_row('not-a-guid', 'A'),
+                        param_row(GUID1, 'B', datatype='WHATEVER'),
+                        param_row(GUID2, 'C', group='7', visible='2'),
+                        ['short']]),
+            [(7, 'bad-group-id'), (9, 'bad-guid'),
+             (10, 'unknown-datatype'), (11, 'bad-flag'),
+             (11, 'orphan-param'), (12, 'short-row')])
+
+    def test_unknown_datatype_is_warning(self):
+        self.assertIn('unknown-datatype', rsparam.WARNING_RULES)
+        self.assertNotIn('bad-guid', rsparam.WARNING_RULES)
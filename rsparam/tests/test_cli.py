@@ -0,0 +1,157 @@
+import io
+import os
+import csv
+import sys
+import json
+import contextlib
+from unittest import mock
+
+import rsparam
+from rsparam import cli
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GUID1 = '0b3c8f1e-2a4d-4e6f-8a9b-1c2d3e4f5a6b'
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2')]
+
+
+class CliTestCase(SampleFileTestCase):
+    def run_cli(self, *argv, **kwargs):
+        out = io.StringIO()
+        old_argv = sys.argv
+        sys.argv = ['rsparam'] + list(argv)
+        if kwargs.get('no_cache', True):
+            sys.argv.insert(1, '--no-cache')
+        try:
+            with contextlib.redirect_stdout(out):
+                cli.main()
+        finally:
+            sys.argv = old_argv
+        return out.getvalue()
+
+
+class StreamedSectionTests(CliTestCase):
+    def setUp(self):
+        super(StreamedSectionTests, self).setUp()
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+
+    def test_list_streams(self):
+        # streamed params never read the whole file
+        with mock.patch('rsparam.read_entries', side_effect=AssertionError):
+            out = self.run_cli('list', '-p', '-c', 'guid:group',
+                               '--format', 'tsv', self.src_file)
+        self.assertEqual(out.splitlines(),
+                         ['guid\tgroup', 'a1\tFire', 'a2\tDoors'])
+
+    def test_find_streams(self):
+        with mock.patch('rsparam.read_entries', side_effect=AssertionError):
+            out = self.run_cli('find', 'Door', '-c', 'guid:name',
+                               '--format', 'csv', self.src_file)
+        self.assertEqual(out.splitlines(),
+                         ['section,guid,name', 'groups,2,Doors',
+                          'params,a2,Door Width'])
+
+    def test_mixed_csv_rejected(self):
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_cli('list', '-a', '--format', 'csv', self.src_file)
+        self.assertIn('-c <columns>', str(ctx.exception.code))
+
+    def test_csv_single_header(self):
+        out = self.run_cli('list', '-a', '-c', 'guid:name',
+                           '--format', 'csv', self.src_file)
+        rows = list(csv.reader(io.StringIO(out)))
+        self.assertEqual(rows[0], ['section', 'guid', 'name'])
+        self.assertEqual([r[0] for r in rows[1:]],
+                         ['groups', 'groups', 'params', 'params'])
+
+    def test_jsonl_sections(self):
+        out = self.run_cli('find', 'Fire', '--format', 'jsonl',
+                           self.src_file)
+        rows = [json.loads(x) for x in out.splitlines()]
+        self.assertEqual([(r['section'], r['name']) for r in rows],
+                         [('groups', 'Fire'), ('params', 'Fire Rating')])
+
+    def test_batch_patterns(self):
+        out = self.run_cli('find', 'batch', '-p', '-c', 'guid',
+                           '--format', 'tsv', self.src_file, 'Fire', 'Door')
+        rows = list(csv.reader(io.StringIO(out), delimiter='\t'))
+        self.assertEqual(rows, [['pattern', 'section', 'guid'],
+                                ['Fire', 'params', 'a1'],
+                                ['Door', 'params', 'a2']])
+
+
+class CheckStatusTests(CliTestCase):
+    def test_unknown_datatype_passes(self):
+        src_file = self.write_file(
+            'src.txt', GROUPS, [param_row(GUID1, 'A', datatype='NEWTYPE')])
+        out = self.run_cli('check', '--format', 'tsv', src_file)
+        self.assertIn('unknown-datatype', out)
+
+    def test_bad_guid_fails(self):
+        src_file = self.write_file('src.txt', GROUPS,
+                                   [param_row('not-a-guid', 'A')])
+        with self.assertRaises(SystemExit) as ctx:
+            self.run_cli('check', '--format', 'tsv', src_file)
+        self.assertEqual(ctx.exception.code, 1)
+
+
+class CacheOptionTests(CliTestCase):
+    def setUp(self):
+        super(CacheOptionTests, self).setUp()
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        self.cache_dir = self.path('cache')
+        patcher = mock.patch('rsparam.CACHE_DIR', self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(rsparam.disable_cache)
+
+    def cache_files(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return os.listdir(self.cache_dir)
+
+    def test_cache_on_by_default(self):
+        self.run_cli('list', '-p', '--format', 'tsv', self.src_file,
+                     no_cache=False)
+        self.assertEqual(1, len(self.cache_files()))
+
+    def test_no_cache(self):
+        self.run_cli('list', '-p', '--format', 'tsv', self.src_file)
+        self.assertEqual([], self.cache_files())
+
+
+class JobsOptionTests(CliTestCase):
+    def test_bad_jobs(self):
+        src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        for jobs in ('two', '0', '-1', '1.5'):
+            for argv in (['scan', self.tempdir],
+                         ['merge', src_file, src_file],
+                         ['subtract', src_file, src_file]):
+                with self.assertRaises(SystemExit) as ctx:
+                    self.run_cli('-q', *(argv[:1] + ['-j', jobs] + argv[1:]))
+                self.assertIn(jobs, str(ctx.exception.code))
+
+    def test_scan_conflicts(self):
+        self.write_file('a.txt', GROUPS, PARAMS)
+        self.write_file('b.txt', GROUPS,
+                        [param_row('a1', 'Fire Class', group='1')])
+        out = self.run_cli('scan', '-j', '2', '--format', 'tsv',
+                           self.tempdir)
+        self.assertEqual(
+            [x.split('\t')[:3] for x in out.splitlines()],
+            [['guid', 'name', 'datatype'],
+             ['a1', 'Fire Rating', 'TEXT'], ['a1', 'Fire Class', 'TEXT']])
+
+
+class FuzzyOptionTests(CliTestCase):
+    def test_bad_threshold(self):
+        src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        for threshold in ('0', '-1', '1.5', 'high'):
+            with self.assertRaises(SystemExit) as ctx:
+                self.run_cli('find', 'dupl', '-p', '--fuzzy', threshold,
+                             '--format', 'tsv', src_file)
+            self.assertIn(threshold, str(ctx.exception.code))
@@ -0,0 +1,48 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2'),
+          param_row('a3', 'Mark', group='2')]
+CHANGED = [param_row('a1', 'Fire Rating', group='1'),
+           param_row('a2', 'Door Leaf Width', group='2', desc='leaf'),
+           param_row('a4', 'Door Height', group='2')]
+
+
+class CompareTests(SampleFileTestCase):
+    def setUp(self):
+        super(CompareTests, self).setUp()
+        self.first_file = self.write_file('first.txt', GROUPS, PARAMS)
+        self.second_file = self.write_file('second.txt',
+                                           [('1', 'Fire'), ('2', 'Door')],
+                                           CHANGED)
+
+    def test_unique(self):
+        uniq1, uniq2 = rsparam.compare(self.first_file, self.second_file)
+        self.assertEqual([x.guid for x in uniq1.params], ['a2', 'a3'])
+        self.assertEqual([x.guid for x in uniq2.params], ['a2', 'a4'])
+        self.assertEqual([x.guid for x in uniq1.groups], ['2'])
+
+    def test_modified(self):
+        uniq1, uniq2, modified = rsparam.compare(
+            self.first_file, self.second_file, modified=True)
+        self.assertEqual([x.guid for x in uniq1.params], ['a3'])
+        self.assertEqual([x.guid for x in uniq2.params], ['a4'])
+        self.assertEqual(uniq1.groups, [])
+        self.assertEqual(uniq2.groups, [])
+
+        self.assertEqual(len(modified.params), 1)
+        change = modified.params[0]
+        self.assertEqual(change.first.name, 'Door Width')
+        self.assertEqual(change.second.name, 'Door Leaf Width')
+        self.assertEqual(change.fields, ['name', 'desc'])
+        self.assertEqual([(x.first.guid, x.fields) for x in modified.groups],
+                         [('2', ['desc'])])
+
+    def test_same_file(self):
+        uniq1, uniq2, modified = rsparam.compare(
+            self.first_file, self.first_file, modified=True)
+        self.assertEqual((uniq1, uniq2, modified),
+                         (([], []), ([], []), ([], [])))
@@ -0,0 +1,76 @@
+import rsparam
+from rsparam import db
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors'), ('3', 'Doors'), ('1', 'Fire Again')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1', desc='rated'),
+          param_row('a2', 'Door Width', group='2', datatype='LENGTH'),
+          param_row('a3', 'Mark', group='2'),
+          param_row('a3', 'Mark', group='3', desc='second mark'),
+          param_row('a4', 'Mark', group='1'),
+          param_row('a5', 'Door Height', group='3', datatype='LENGTH')]
+
+
+def summary(spitems):
+    return [(x.guid, x.name, x.lineno,
+             getattr(getattr(x, 'group', None), 'name', None))
+            for x in spitems]
+
+
+class SharedParamDBTests(SampleFileTestCase):
+    def setUp(self):
+        super(SharedParamDBTests, self).setUp()
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        self.db_file = self.path('params.db')
+        db.export_sqlite(self.src_file, self.db_file)
+        self.spdb = db.SharedParamDB(self.db_file)
+        self.addCleanup(self.spdb.close)
+
+    def test_roundtrip(self):
+        out_file = self.path('out.txt')
+        db.import_sqlite(self.db_file, out_file=out_file)
+        spentries = rsparam.read_entries(self.src_file)
+        readback = rsparam.read_entries(out_file)
+        self.assertEqual(set(spentries.groups), set(readback.groups))
+        self.assertEqual(set(spentries.params), set(readback.params))
+        self.assertEqual(
+            sorted((x.guid, x.group.guid, x.group.name)
+                   for x in spentries.params),
+            sorted((x.guid, x.group.guid, x.group.name)
+                   for x in readback.params))
+
+    def test_import_entries(self):
+        spentries = rsparam.read_entries(self.src_file)
+        imported = db.import_sqlite(self.db_file)
+        self.assertEqual(summary(spentries.groups), summary(imported.groups))
+        self.assertEqual(summary(spentries.params), summary(imported.params))
+
+    def test_get_params(self):
+        for groupid in (None, '1', '2', '3', '9'):
+            self.assertEqual(
+                summary(rsparam.get_params(self.src_file, groupid=groupid)),
+                summary(self.spdb.get_params(groupid=groupid)),
+                groupid)
+
+    def test_find(self):
+        for searchstr, fields in (('Door', None), ('^Mark$', ['name']),
+                                  ('Fire', ['group']), ('rated|second',
+                                                        ['desc']),
+                                  ('^a[13]$', ['guid']), ('Doors', None)):
+            spentries = rsparam.find(self.src_file, searchstr, fields=fields)
+            dbentries = self.spdb.find(searchstr, fields=fields)
+            self.assertEqual(summary(spentries.groups),
+                             summary(dbentries.groups), searchstr)
+            self.assertEqual(summary(spentries.params),
+                             summary(dbentries.params), searchstr)
+
+    def test_find_duplicates(self):
+        for byname in (False, True):
+            spentries = rsparam.find_duplicates(self.src_file, byname=byname)
+            dbentries = self.spdb.find_duplicates(byname=byname)
+            self.assertEqual([summary(x) for x in spentries.groups],
+                             [summary(x) for x in dbentries.groups])
+            self.assertEqual([summary(x) for x in spentries.params],
+                             [summary(x) for x in dbentries.params])
+            self.assertTrue(spentries.params)
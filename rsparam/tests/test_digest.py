@@ -0,0 +1,37 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2'),
+          param_row('a3', 'Mark', group='2')]
+
+
+class DigestTests(SampleFileTestCase):
+    def digest(self, groups, params):
+        return rsparam.digest(self.write_file('src.txt', groups, params))
+
+    def test_order_independent(self):
+        spdigest = self.digest(GROUPS, PARAMS)
+        reordered = self.digest(GROUPS[::-1], PARAMS[::-1])
+        self.assertEqual(spdigest, reordered)
+
+    def test_changed_param(self):
+        spdigest = self.digest(GROUPS, PARAMS)
+        changed = self.digest(
+            GROUPS, PARAMS[:2] + [param_row('a3', 'Mark', group='2',
+                                            desc='changed')]
+            )
+        self.assertNotEqual(spdigest.digest, changed.digest)
+        self.assertEqual(spdigest.groups['1'], changed.groups['1'])
+        self.assertNotEqual(spdigest.groups['2'], changed.groups['2'])
+
+    def test_moved_param(self):
+        spdigest = self.digest(GROUPS, PARAMS)
+        moved = self.digest(
+            GROUPS, PARAMS[:2] + [param_row('a3', 'Mark', group='1')]
+            )
+        self.assertNotEqual(spdigest.digest, moved.digest)
+        self.assertNotEqual(spdigest.groups['1'], moved.groups['1'])
+        self.assertNotEqual(spdigest.groups['2'], moved.groups['2'])
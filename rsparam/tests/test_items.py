@@ -0,0 +1,37 @@
+import pickle
+import unittest
+
+import rsparam
+from rsparam.tests.sample import param_row
+
+
+class ItemKeyTests(unittest.TestCase):
+    def test_assignment_clears_key(self):
+        sparam = rsparam.SharedParam(param_row('a1', 'Mark'), lineno=0)
+        other = rsparam.SharedParam(param_row('a1', 'Tag'), lineno=0)
+        self.assertNotEqual(sparam, other)
+        self.assertEqual(sparam.key[1], 'Mark')
+
+        sparam.name = 'Tag'
+        self.assertEqual(sparam.key[1], 'Tag')
+        self.assertEqual(sparam, other)
+        self.assertEqual(hash(sparam), hash(other))
+        self.assertEqual(len(set([sparam, other])), 1)
+
+    def test_group_assignment(self):
+        spgroup = rsparam.SharedParamGroup(['1', 'Fire'], lineno=0)
+        hash(spgroup)
+        spgroup.desc = 'Doors'
+        self.assertEqual(spgroup.key, ('1', 'Doors'))
+        self.assertEqual(spgroup.name, 'Doors')
+        with self.assertRaises(AttributeError):
+            spgroup.name = 'Fire'
+        self.assertEqual(hash(spgroup), hash(('1', 'Doors')))
+
+    def test_pickle(self):
+        sparam = rsparam.SharedParam(param_row('a1', 'Mark'), lineno=0)
+        hash(sparam)
+        copied = pickle.loads(pickle.dumps(sparam, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copied, sparam)
+        self.assertEqual(list(copied), list(sparam))
+        self.assertEqual(copied.lineno, 1)
@@ -0,0 +1,70 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, file_text, param_row
+
+
+class ParallelMergeTests(SampleFileTestCase):
+    """Merge and subtract reading files in a process pool."""
+
+    def setUp(self):
+        super(ParallelMergeTests, self).setUp()
+        self.src_files = [
+            self.write_file('a.txt', [('1', 'Fire'), ('2', 'Doors')],
+                            [param_row('a1', 'Fire Rating', group='1'),
+                             param_row('a2', 'Door Width', group='2')]),
+            self.write_file('b.txt', [('1', 'Fire'), ('3', 'Walls')],
+                            [param_row('a1', 'Fire Rating', group='1'),
+                             param_row('b1', 'Wall Type', group='3')]),
+            self.write_late_file('c.txt'),
+            self.write_file('d.txt', [('2', 'Doors')],
+                            [param_row('a2', 'Door Width', group='2'),
+                             param_row('d1', 'Door Mark', group='2',
+                                       desc='marked')]),
+            ]
+
+    def write_late_file(self, filename):
+        # param listed before the GROUP row it belongs to
+        text = file_text([('4', 'Late')],
+                         [param_row('c1', 'Late Param', group='4')])
+        head, groups, params = text.partition('GROUP\t4\tLate\r\n')
+        src_file = self.path(filename)
+        with open(src_file, 'wb') as spf:
+            spf.write((head + params + groups).encode('utf-8'))
+        return src_file
+
+    def summary(self, spentries):
+        return (sorted((x.guid, x.desc) for x in spentries.groups),
+                sorted((x.guid, x.name, x.desc, x.group.guid, x.group.desc)
+                       for x in spentries.params))
+
+    def test_merge(self):
+        merged = rsparam.merge(self.src_files, jobs=1)
+        self.assertEqual(self.summary(merged),
+                         self.summary(rsparam.merge(self.src_files, jobs=2)))
+        self.assertIn(('c1', 'Late Param', '', '4', 'Late'),
+                      self.summary(merged)[1])
+
+    def test_merge_out_file(self):
+        out_files = [self.path('merged{}.txt'.format(x)) for x in (1, 2)]
+        for jobs, out_file in zip((1, 2), out_files):
+            rsparam.merge(self.src_files, out_file=out_file, jobs=jobs)
+        with open(out_files[0], 'rb') as first, \
+                open(out_files[1], 'rb') as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_subtract(self):
+        target = self.write_file(
+            'target.txt',
+            [('1', 'Fire'), ('2', 'Doors'), ('3', 'Walls'), ('4', 'Late')],
+            [param_row('a1', 'Fire Rating', group='1'),
+             param_row('a2', 'Door Width', group='2'),
+             param_row('b1', 'Wall Type', group='3'),
+             param_row('c1', 'Late Param', group='4'),
+             param_row('x1', 'Door Handle', group='2')])
+        sources = self.src_files[1:]
+        subtracted = rsparam.subtract(target, sources, jobs=1)
+        self.assertEqual(self.summary(subtracted),
+                         self.summary(rsparam.subtract(target, sources,
+                                                       jobs=3)))
+        self.assertEqual(
+            ([], [('x1', 'Door Handle', '', '2', 'Doors')]),
+            self.summary(subtracted))
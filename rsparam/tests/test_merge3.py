@@ -0,0 +1,84 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2'),
+          param_row('a3', 'Mark', group='2')]
+
+
+def replaced(params, guid, **fields):
+    # param rows with the row of guid rewritten with changed fields
+    rows = []
+    for row in params:
+        if row[0] == guid:
+            names = ['name', 'datatype', 'datacategory', 'group', 'visible',
+                     'desc', 'usermod']
+            values = dict(zip(names, row[1:]))
+            values.update(fields)
+            row = param_row(guid, values.pop('name'), **values)
+        rows.append(row)
+    return rows
+
+
+class Merge3Tests(SampleFileTestCase):
+    def merge3(self, ours, theirs):
+        return rsparam.merge3(self.write_file('base.txt', GROUPS, PARAMS),
+                              self.write_file('ours.txt', *ours),
+                              self.write_file('theirs.txt', *theirs))
+
+    def params(self, merged):
+        return {x.guid: x for x in merged.params}
+
+    def test_one_sided_edits(self):
+        merged, conflicts = self.merge3(
+            (GROUPS, replaced(PARAMS, 'a1', desc='rated')),
+            (GROUPS, replaced(PARAMS, 'a2', name='Door Leaf Width')))
+        self.assertEqual(conflicts, ([], []))
+        params = self.params(merged)
+        self.assertEqual(params['a1'].desc, 'rated')
+        self.assertEqual(params['a2'].name, 'Door Leaf Width')
+        self.assertEqual(params['a3'].name, 'Mark')
+
+    def test_both_sided_conflict(self):
+        merged, conflicts = self.merge3(
+            (GROUPS, replaced(PARAMS, 'a1', name='Fire Rating A',
+                              desc='ours')),
+            (GROUPS, replaced(PARAMS, 'a1', name='Fire Rating B')))
+        self.assertEqual(conflicts.groups, [])
+        self.assertEqual(len(conflicts.params), 1)
+        conflict = conflicts.params[0]
+        self.assertEqual(conflict.fields, ['name'])
+        self.assertEqual(conflict.theirs.name, 'Fire Rating B')
+        params = self.params(merged)
+        self.assertEqual(params['a1'].name, 'Fire Rating A')
+        self.assertEqual(params['a1'].desc, 'ours')
+
+    def test_modify_vs_delete(self):
+        merged, conflicts = self.merge3(
+            (GROUPS, PARAMS[:2]),
+            (GROUPS, replaced(PARAMS, 'a3', desc='changed')))
+        self.assertEqual(len(conflicts.params), 1)
+        conflict = conflicts.params[0]
+        self.assertIsNone(conflict.ours)
+        self.assertEqual(conflict.theirs.desc, 'changed')
+        self.assertEqual(self.params(merged)['a3'].desc, 'changed')
+
+    def test_unchanged_delete(self):
+        merged, conflicts = self.merge3((GROUPS, PARAMS[:2]),
+                                        (GROUPS, PARAMS))
+        self.assertEqual(conflicts, ([], []))
+        self.assertNotIn('a3', self.params(merged))
+
+    def test_group_kept_for_surviving_param(self):
+        # ours drops the doors group with its params, theirs adds a param
+        merged, conflicts = self.merge3(
+            (GROUPS[:1], PARAMS[:1]),
+            (GROUPS, PARAMS + [param_row('a4', 'Door Height', group='2')]))
+        self.assertEqual(conflicts, ([], []))
+        params = self.params(merged)
+        self.assertEqual(sorted(params), ['a1', 'a4'])
+        self.assertEqual(sorted(x.guid for x in merged.groups), ['1', '2'])
+        self.assertIsInstance(params['a4'].group, rsparam.SharedParamGroup)
+        self.assertEqual(params['a4'].group.desc, 'Doors')
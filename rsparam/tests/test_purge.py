@@ -0,0 +1,48 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GUID1 = '0b3c8f1e-2a4d-4e6f-8a9b-1c2d3e4f5a6b'
+GUID2 = '1c4d9a2f-3b5e-4f7a-9b0c-2d3e4f5a6b7c'
+GUID3 = '2d5e0b3a-4c6f-4a8b-8c1d-3e4f5a6b7c8d'
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row(GUID1, 'Fire Rating', group='1'),
+          param_row(GUID2, 'Door Width', group='2'),
+          param_row(GUID3, 'Mark', group='2')]
+
+
+class PurgeTests(SampleFileTestCase):
+    def setUp(self):
+        super(PurgeTests, self).setUp()
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+
+    def write_manifest(self, text):
+        manifest_file = self.path('manifest.txt')
+        with open(manifest_file, 'wb') as mf:
+            mf.write(text.encode('utf-8'))
+        return manifest_file
+
+    def test_manifest_file(self):
+        manifest_file = self.write_manifest(
+            '# used params\r\n'
+            '{}\tDoor Width\tfamily.rfa\r\n'
+            '\r\n'
+            '{},Mark\n'.format(GUID2.upper(), GUID3))
+        purged = rsparam.purge(self.src_file, manifest_file)
+        self.assertEqual([x.guid for x in purged.params], [GUID2, GUID3])
+        # groups left without params are dropped
+        self.assertEqual([x.guid for x in purged.groups], ['2'])
+
+    def test_guid_iterable(self):
+        purged = rsparam.purge(self.src_file, [GUID1.upper()])
+        self.assertEqual([x.guid for x in purged.params], [GUID1])
+        self.assertEqual([x.guid for x in purged.groups], ['1'])
+
+    def test_out_file(self):
+        out_file = self.path('purged.txt')
+        self.assertIsNone(rsparam.purge(self.src_file, [GUID3],
+                                        out_file=out_file))
+        spgroups, sparams = rsparam.read_entries(out_file)
+        self.assertEqual([x.guid for x in sparams], [GUID3])
+        self.assertEqual(sparams[0].group.desc, 'Doors')
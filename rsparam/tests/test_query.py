@@ -0,0 +1,72 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, file_text, param_row
+
+
+class LateGroupTests(SampleFileTestCase):
+    """Params listed before the GROUP row they belong to."""
+
+    def setUp(self):
+        super(LateGroupTests, self).setUp()
+        text = file_text([('1', 'Fire')],
+                         [param_row('a1', 'Fire Rating', group='1')])
+        # move the params before the group rows
+        head, groups, params = text.partition('GROUP\t1\tFire\r\n')
+        self.src_file = self.path('late.txt')
+        with open(self.src_file, 'wb') as spf:
+            spf.write((head + params + groups).encode('utf-8'))
+
+    def assert_resolved(self, sparams):
+        self.assertEqual(['Fire'], [x.group.name for x in sparams])
+
+    def test_read_entries(self):
+        self.assert_resolved(rsparam.read_entries(self.src_file).params)
+
+    def test_get_params(self):
+        self.assert_resolved(rsparam.get_params(self.src_file))
+        self.assert_resolved(rsparam.get_params(self.src_file, groupid='1'))
+
+    def test_find(self):
+        self.assert_resolved(rsparam.find(self.src_file, 'Rating').params)
+        # params are matched on the name of their group
+        self.assert_resolved(rsparam.find(self.src_file, '^Fire$',
+                                          fields=['group']).params)
+
+    def test_find_batch(self):
+        matches = rsparam.find_batch(self.src_file, ['Rating'])
+        self.assert_resolved(matches['Rating'].params)
+
+    def test_purge(self):
+        out_file = self.path('purged.txt')
+        rsparam.purge(self.src_file, ['a1'], out_file=out_file)
+        self.assert_resolved(rsparam.read_entries(out_file).params)
+
+    def test_stream_params(self):
+        spfile = rsparam.SharedParamFile(self.src_file)
+        self.assert_resolved(list(spfile.stream_params()))
+
+
+class StreamParamsTests(SampleFileTestCase):
+    def setUp(self):
+        super(StreamParamsTests, self).setUp()
+        self.src_file = self.write_file(
+            'src.txt', [('1', 'Fire'), ('2', 'Doors')],
+            [param_row('a1', 'Fire Rating', group='1'),
+             param_row('a2', 'Door Width', group='2'),
+             param_row('a3', 'Mark', group='3')]
+            )
+
+    def test_streams_until_late_group(self):
+        spfile = rsparam.SharedParamFile(self.src_file)
+        sparams = spfile.stream_params()
+        self.assertEqual('Fire', next(sparams).group.name)
+        self.assertEqual('Doors', next(sparams).group.name)
+        # the file is read on the first param without a group
+        self.assertIsNone(spfile._entries)
+        self.assertEqual(['a3'], [x.guid for x in sparams])
+        self.assertIsNotNone(spfile._entries)
+
+    def test_group_filter(self):
+        spfile = rsparam.SharedParamFile(self.src_file)
+        self.assertEqual(['a2'],
+                         [x.guid for x in spfile.stream_params(groupid='2')])
+        self.assertIsNone(spfile._entries)
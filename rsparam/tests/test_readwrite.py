@@ -0,0 +1,102 @@
+import tracemalloc
+
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GUID1 = '1846d424-c17c-4279-a3c6-612f48268673'
+GUID2 = '2846d424-c17c-4279-a3c6-612f48268673'
+GUID3 = '3846d424-c17c-4279-a3c6-612f48268673'
+
+
+class ReadWriteTests(SampleFileTestCase):
+    def setUp(self):
+        super(ReadWriteTests, self).setUp()
+        self.src_file = self.write_file(
+            'src.txt',
+            [('1', 'Fire'), ('2', 'Doors')],
+            [param_row(GUID1, 'Fire Rating', group='1'),
+             param_row(GUID2, 'Door Width', group='2', datatype='LENGTH'),
+             param_row(GUID3, 'Mark', group='2')]
+            )
+
+    def roundtrip(self, spentries):
+        out_file = self.path('out.txt')
+        rsparam.write_entries(spentries, out_file, encoding='utf-8')
+        return rsparam.read_entries(out_file, encoding='utf-8')
+
+    def test_read_entries(self):
+        spentries = rsparam.read_entries(self.src_file)
+        self.assertEqual(['Fire', 'Doors'],
+                         [x.name for x in spentries.groups])
+        self.assertEqual(['Fire Rating', 'Door Width', 'Mark'],
+                         [x.name for x in spentries.params])
+        self.assertIs(spentries.groups[1], spentries.params[1].group)
+        self.assertEqual(9, spentries.params[0].lineno)
+
+    def test_roundtrip(self):
+        spentries = rsparam.read_entries(self.src_file)
+        readback = self.roundtrip(spentries)
+        self.assertEqual(set(spentries.groups), set(readback.groups))
+        self.assertEqual(set(spentries.params), set(readback.params))
+
+    def test_roundtrip_quoted_fields(self):
+        spentries = rsparam.read_entries(self.src_file)
+        descs = {GUID1: 'line one\nline two',
+                 GUID2: 'tab\there and "quotes"\r\nand crlf',
+                 GUID3: 'plain'}
+        sparams = [rsparam.SharedParam(
+            [x.guid, x.name, x.datatype, x.datacategory, x.group.guid,
+             x.visible, descs[x.guid], x.usermod], lineno=0)
+            for x in spentries.params]
+        for sparam in sparams:
+            sparam.group = spentries.groups[int(sparam.group) - 1]
+
+        readback = self.roundtrip(
+            rsparam.SharedParamEntries(spentries.groups, sparams)
+            )
+        self.assertEqual(descs, {x.guid: x.desc for x in readback.params})
+        self.assertEqual(['Doors', 'Doors', 'Fire'],
+                         sorted(x.group.name for x in readback.params))
+
+    def test_unquoted_inch_marks(self):
+        src_file = self.write_file(
+            'inch.txt', [('1', 'Pipes')],
+            [param_row(GUID1, 'Diameter', desc='Pipe diameter 3" nominal'),
+             param_row(GUID2, 'Length', desc='Length in "'),
+             param_row(GUID3, 'Mark')]
+            )
+        spentries = rsparam.read_entries(src_file)
+        self.assertEqual([(GUID1, 'Pipe diameter 3" nominal', 8),
+                          (GUID2, 'Length in "', 9),
+                          (GUID3, '', 10)],
+                         [(x.guid, x.desc, x.lineno)
+                          for x in spentries.params])
+        self.assertEqual([], rsparam.check(src_file))
+
+    def test_lineno_after_quoted_line_breaks(self):
+        src_file = self.path('quoted.txt')
+        with open(src_file, 'wb') as spf:
+            spf.write(open(self.src_file, 'rb').read().replace(
+                b'\tFire Rating\t', b'\t"Fire\r\nRating"\t'))
+        sparams = rsparam.read_entries(src_file).params
+        self.assertEqual([('Fire\r\nRating', 9), ('Door Width', 11),
+                          ('Mark', 12)],
+                         [(x.name, x.lineno) for x in sparams])
+
+    def test_iter_entries_memory(self):
+        src_file = self.write_file(
+            'large.txt', [('1', 'Fire')],
+            [param_row('{:08x}-0000-0000-0000-000000000000'.format(x),
+                       'Param {}'.format(x), desc='x' * 50)
+             for x in range(20000)]
+            )
+        tracemalloc.start()
+        try:
+            for _ in rsparam.iter_entries(src_file):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # the file is about 2.5 MB
+        self.assertLess(peak, 512 * 1024)
@@ -0,0 +1,77 @@
+import os
+from concurrent import futures
+from unittest import mock
+
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+class ScanTests(SampleFileTestCase):
+    def setUp(self):
+        super(ScanTests, self).setUp()
+        self.write_file('a.txt', [('1', 'Fire')],
+                        [param_row('a1', 'Fire Rating'),
+                         param_row('a2', 'Door Width')])
+        os.mkdir(self.path('sub'))
+        self.write_file(os.path.join('sub', 'b.txt'), [('1', 'Fire')],
+                        [param_row('a1', 'Fire Rating'),
+                         param_row('a2', 'Door Width', datatype='LENGTH'),
+                         param_row('b1', 'Mark')])
+        self.write_file('c.txt', [('1', 'Fire')],
+                        [param_row('a1', 'Fire Class'),
+                         param_row('c1', 'Tag')])
+        self.write_file('notes.md', [('1', 'Fire')],
+                        [param_row('a1', 'Ignored')])
+
+    def summary(self, results):
+        return ({k: [(os.path.relpath(x.src_file, self.tempdir), x.lineno,
+                      x.name, x.datatype) for x in v]
+                 for k, v in results.index.items()},
+                list(results.conflicts), results.errors)
+
+    def test_conflicts(self):
+        results = rsparam.scan(self.tempdir, encoding='utf-8')
+        self.assertEqual(['a1', 'a2', 'c1', 'b1'], list(results.index))
+        self.assertEqual(['a1', 'a2'], list(results.conflicts))
+        self.assertEqual(
+            [('a.txt', 'Fire Rating', 'TEXT'),
+             ('c.txt', 'Fire Class', 'TEXT'),
+             (os.path.join('sub', 'b.txt'), 'Fire Rating', 'TEXT')],
+            [(os.path.relpath(x.src_file, self.tempdir), x.name, x.datatype)
+             for x in results.conflicts['a1']])
+        self.assertEqual([], results.errors)
+
+    def test_lineno(self):
+        # line numbers are 1-based, as for SharedParam
+        results = rsparam.scan(self.tempdir, encoding='utf-8')
+        spfile = rsparam.SharedParamFile(self.path('c.txt'),
+                                         encoding='utf-8')
+        self.assertEqual([x.lineno for x in spfile.params],
+                         [results.conflicts['a1'][1].lineno,
+                          results.index['c1'][0].lineno])
+
+    def test_pattern(self):
+        results = rsparam.scan(self.tempdir, encoding='utf-8',
+                               pattern='*.md')
+        self.assertEqual(['a1'], list(results.index))
+        self.assertEqual({}, dict(results.conflicts))
+
+    def test_unreadable_file(self):
+        with open(self.path('bad.txt'), 'wb') as spf:
+            spf.write(b'GROUP\t1\t\x80\x81\r\n')
+        results = rsparam.scan(self.tempdir, encoding='utf-8')
+        self.assertEqual([self.path('bad.txt')],
+                         [x for x, _ in results.errors])
+        self.assertIn('decode', results.errors[0][1])
+        # the other files are still indexed
+        self.assertEqual(['a1', 'a2'], list(results.conflicts))
+
+    def test_pool(self):
+        with open(self.path('bad.txt'), 'wb') as spf:
+            spf.write(b'GROUP\t1\t\x80\x81\r\n')
+        serial = rsparam.scan(self.tempdir, encoding='utf-8', jobs=1)
+        with mock.patch('concurrent.futures.ProcessPoolExecutor',
+                        wraps=futures.ProcessPoolExecutor) as executor:
+            pooled = rsparam.scan(self.tempdir, encoding='utf-8', jobs=2)
+        executor.assert_called_once_with(max_workers=2)
+        self.assertEqual(self.summary(serial), self.summary(pooled))
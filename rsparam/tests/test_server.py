@@ -0,0 +1,87 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from rsparam import server
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2'),
+          param_row('a3', 'Mark', group='2')]
+
+
+class ServerTests(SampleFileTestCase):
+    def setUp(self):
+        super(ServerTests, self).setUp()
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        self.server = server.SharedParamServer(('127.0.0.1', 0), quiet=True,
+                                               roots=[self.tempdir])
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get(self, path, **query):
+        url = 'http://127.0.0.1:{}{}?{}'.format(self.server.server_port,
+                                                path, urlencode(query))
+        try:
+            with urlopen(url) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as http_err:
+            return http_err.code, json.loads(http_err.read())
+
+    def test_find(self):
+        status, result = self.get('/find', file=self.src_file,
+                                  pattern='Door', fields='name:desc')
+        self.assertEqual(200, status)
+        self.assertEqual(['Doors'], [x['name'] for x in result['groups']])
+        self.assertEqual(['a2'], [x['guid'] for x in result['params']])
+
+    def test_params(self):
+        # relative paths are taken from the first root
+        status, result = self.get('/params', file='src.txt', group='2')
+        self.assertEqual(200, status)
+        self.assertEqual(['a2', 'a3'], [x['guid'] for x in result])
+        self.assertEqual('2', result[0]['group'])
+
+    def test_duplicates(self):
+        self.write_file('dupl.txt', GROUPS,
+                        PARAMS + [param_row('a4', 'Mark', group='1')])
+        status, result = self.get('/duplicates', file='dupl.txt', byname=1)
+        self.assertEqual(200, status)
+        self.assertEqual([['a3', 'a4']],
+                         [[x['guid'] for x in dlist]
+                          for dlist in result['params']])
+
+    def test_compare(self):
+        self.write_file('second.txt', GROUPS,
+                        PARAMS[:2] + [param_row('a3', 'Tag', group='2')])
+        status, result = self.get('/compare', first='src.txt',
+                                  second='second.txt', modified='1')
+        self.assertEqual(200, status)
+        self.assertEqual([], result['first']['params'])
+        self.assertEqual([['name']],
+                         [x['fields'] for x in result['modified']['params']])
+
+    def test_errors(self):
+        self.assertEqual(404, self.get('/nothing')[0])
+        self.assertEqual(400, self.get('/find', file='src.txt')[0])
+        status, result = self.get('/find', file='src.txt', pattern='(')
+        self.assertEqual(400, status)
+        self.assertIn('error', result)
+        self.assertEqual(404, self.get('/params', file='missing.txt')[0])
+
+    def test_outside_roots(self):
+        status, result = self.get('/params', file='../../etc/passwd')
+        self.assertEqual(403, status)
+        self.assertEqual(403, self.get('/params', file='/etc/passwd')[0])
+
+    def test_refresh(self):
+        self.assertEqual(3, len(self.get('/params', file='src.txt')[1]))
+        self.write_file('src.txt', GROUPS, PARAMS[:2])
+        self.assertEqual(2, len(self.get('/params', file='src.txt')[1]))
@@ -0,0 +1,80 @@
+import random
+import unittest
+from itertools import combinations
+
+import rsparam
+
+
+def make_params(names):
+    return [rsparam.SharedParam([str(idx), name, 'TEXT', '', '1', '1', '',
+                                 '1'], lineno=idx)
+            for idx, name in enumerate(names)]
+
+
+def brute_force_clusters(sparams, threshold):
+    # score every pair of name keys
+    keys = sorted(set(rsparam._name_key(x.name) for x in sparams))
+    grams = {x: rsparam._name_grams(x) for x in keys}
+    parents = {x: x for x in keys}
+
+    def find_root(key):
+        while parents[key] != key:
+            key = parents[key]
+        return key
+
+    for key1, key2 in combinations(keys, 2):
+        common = len(grams[key1] & grams[key2])
+        if 2.0 * common / (len(grams[key1]) + len(grams[key2])) \
+                >= threshold:
+            parents[find_root(key1)] = find_root(key2)
+
+    clusters = {}
+    for sparam in sparams:
+        clusters.setdefault(find_root(rsparam._name_key(sparam.name)),
+                            set()).add(sparam.guid)
+    return set(frozenset(x) for x in clusters.values() if len(x) > 1)
+
+
+def clusters(sparams, threshold):
+    return set(frozenset(x.guid for x in cluster)
+               for cluster in rsparam._similar_clusters(sparams, threshold))
+
+
+class SimilarTests(unittest.TestCase):
+    def test_normalized_names(self):
+        sparams = make_params(['Fire Rating', 'FireRating', 'fire_rating ',
+                               'Door Width'])
+        self.assertEqual({frozenset(['0', '1', '2'])},
+                         clusters(sparams, 1.0))
+
+    def test_exact_threshold(self):
+        # dice of trigrams is exactly 0.8
+        sparams = make_params(['fire', 'firefire', 'load', 'loadload'])
+        self.assertEqual({frozenset(['0', '1']), frozenset(['2', '3'])},
+                         clusters(sparams, 0.8))
+
+    def test_random_names_match_brute_force(self):
+        rand = random.Random(20)
+        words = ['fire', 'rating', 'door', 'width', 'load', 'area', 'a',
+                 'ab', 'mark', 'x1', 'x2']
+        for _ in range(20):
+            names = []
+            for _ in range(rand.randint(10, 60)):
+                name = ' '.join(rand.choice(words)
+                                for _ in range(rand.randint(1, 3)))
+                if rand.random() < 0.3:
+                    name = name.replace(' ', rand.choice(['', '_', '  ']))
+                if rand.random() < 0.3:
+                    name += rand.choice('abcdefgh')
+                names.append(name)
+            sparams = make_params(names)
+            for threshold in (0.1, 0.3, 0.5, 2 / 3.0, 0.75, 0.8, 0.9, 1.0):
+                self.assertEqual(brute_force_clusters(sparams, threshold),
+                                 clusters(sparams, threshold),
+                                 (names, threshold))
+
+    def test_threshold_range(self):
+        spentries = rsparam.SharedParamEntries([], make_params(['a', 'b']))
+        for threshold in (0, -0.5, 1.5):
+            with self.assertRaises(ValueError):
+                rsparam._find_similar(spentries, threshold)
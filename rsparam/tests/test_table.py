@@ -0,0 +1,62 @@
+import rsparam
+from rsparam.tests.sample import SampleFileTestCase, param_row
+
+
+GROUPS = [('1', 'Fire'), ('2', 'Doors')]
+PARAMS = [param_row('a1', 'Fire Rating', group='1'),
+          param_row('a2', 'Door Width', group='2', datatype='LENGTH'),
+          param_row('a3', 'Märk', group='2', desc='tag "text"')]
+
+
+class SharedParamTableTests(SampleFileTestCase):
+    def setUp(self):
+        super(SharedParamTableTests, self).setUp()
+        self.src_file = self.write_file('src.txt', GROUPS, PARAMS)
+        self.table = rsparam.read_entries(self.src_file,
+                                          columnar=True).params
+
+    def test_same_as_objects(self):
+        sparams = rsparam.read_entries(self.src_file).params
+        self.assertEqual(3, len(self.table))
+        self.assertEqual(sparams, list(self.table))
+        self.assertEqual([x.lineno for x in sparams],
+                         [x.lineno for x in self.table])
+        self.assertEqual([x.group.name for x in sparams],
+                         [x.group.name for x in self.table])
+
+    def test_getitem(self):
+        sparam = self.table[2]
+        self.assertEqual(('a3', 'Märk', 'tag "text"', 'Doors'),
+                         (sparam.guid, sparam.name, sparam.desc,
+                          sparam.group.name))
+        self.assertEqual('a3', self.table[-1].guid)
+        with self.assertRaises(IndexError):
+            self.table[3]
+        with self.assertRaises(IndexError):
+            self.table[-4]
+
+    def test_column(self):
+        self.assertEqual(['a1', 'a2', 'a3'], self.table.column('guid'))
+        self.assertEqual(['TEXT', 'LENGTH', 'TEXT'],
+                         self.table.column('datatype'))
+        self.assertEqual(['1', '2', '2'], self.table.column('group'))
+        self.assertEqual([9, 10, 11], self.table.column('lineno'))
+
+    def test_select(self):
+        doors = self.table.select(group='2')
+        self.assertEqual(['a2', 'a3'], doors.column('guid'))
+        self.assertEqual([10, 11], doors.column('lineno'))
+        # groups can be given as objects, and columns are combined
+        spgroup = doors[0].group
+        self.assertEqual(['a3'], self.table.select(group=spgroup,
+                                                   datatype='TEXT')
+                         .column('guid'))
+        self.assertEqual(['a1'], self.table.select(name='Fire Rating')
+                         .column('guid'))
+        self.assertEqual(0, len(self.table.select(datatype='AREA')))
+
+    def test_append(self):
+        sparams = rsparam.read_entries(self.src_file).params
+        table = rsparam.SharedParamTable(sparams)
+        self.assertEqual(sparams, list(table))
+        self.assertIs(sparams[1].group, table[1].group)